@@ -0,0 +1,101 @@
+"""
+Micro-benchmark لـ build_embed: تكلفة بناء الـ Embed لكل Board عند 10k Board
+
+التشغيل:
+    python bench_embed.py [عدد_البوردات] [عدد_الدورات]
+"""
+import random
+import sys
+import time
+from datetime import datetime
+
+import discord
+
+import main
+
+STATUSES = ["online", "offline", "standby"]
+CUSTOM_TITLES = [None, None, "{status} | My Server", "🔥 {status}"]
+CUSTOM_DESCS = [None, None, "IP: {ip}:{port}\nPlayers: {players}/{max_players}", "Version {version}"]
+
+def legacy_build_embed(ip, port, version, status_info, board="Vanilla Survival", image_url=None,
+                       image_pos=None, style="classic", custom_title=None, custom_desc=None,
+                       is_maintenance=False):
+    """نسخة build_embed قبل القوالب (للمقارنة فقط)"""
+    style_data = main.STYLES.get(style, main.STYLES["classic"])
+    status = "maintenance" if is_maintenance else status_info.get("status", "offline")
+    if status == "online":
+        title = f"{style_data['emojis']['online']} السيرفر أونلاين"
+        desc = f"**IP:** `{ip}`\n**Port:** `{port}`\n**Version:** {version}\n**Players:** {status_info.get('players', 0)}/{status_info.get('max_players', 0)}\n**Ping:** {status_info.get('latency', 0)}ms"
+    elif status == "standby":
+        title = f"{style_data['emojis']['standby']} السيرفر في وضع الاستعداد"
+        desc = f"**IP:** `{ip}`\n**Port:** `{port}`\n**Version:** {version}\n⏳ السيرفر يتحمل أو في وضع Starting..."
+    else:
+        title = f"{style_data['emojis']['offline']} السيرفر أوفلاين"
+        desc = f"**IP:** `{ip}`\n**Port:** `{port}`\n**Version:** {version}\n❌ السيرفر غير متصل حالياً"
+    if custom_title:
+        title = custom_title.replace("{status}", title)
+    if custom_desc:
+        desc = custom_desc.replace("{ip}", ip).replace("{port}", port).replace("{version}", version)
+    embed = discord.Embed(title=f"{style_data['name']} — {title}", description=desc,
+                          color=style_data["colors"][status])
+    embed.add_field(name="📌 Board", value=board, inline=False)
+    if status_info.get("motd") and not is_maintenance:
+        embed.add_field(name="📝 MOTD", value=f"```{status_info['motd'][:100]}```", inline=False)
+    now = datetime.now().strftime("%I:%M %p")
+    embed.set_footer(text=f"Niward v1.6 | آخر تحديث: اليوم {now}")
+    return embed
+
+def make_boards(count: int, unique: bool = False) -> list:
+    """unique=True: كل Board له وصف مخصص خاص به (أسوأ حالة للقوالب)"""
+    rng = random.Random(42)
+    boards = []
+    for i in range(count):
+        status = rng.choice(STATUSES)
+        boards.append({
+            "ip": f"play{i}.example.com",
+            "port": str(25565 + i % 100),
+            "version": rng.choice(["جافا", "بيدروك", "كلاهما"]),
+            "status_info": {
+                "status": status,
+                "players": rng.randint(0, 100) if status == "online" else 0,
+                "max_players": 100,
+                "latency": rng.randint(5, 200),
+                "motd": "A Minecraft Server"
+            },
+            "board": f"Board {i}",
+            "style": rng.choice(list(main.STYLES)),
+            "custom_title": rng.choice(CUSTOM_TITLES),
+            "custom_desc": f"#{i} IP: {{ip}}:{{port}}\nPlayers: {{players}}/{{max_players}}" if unique
+                           else rng.choice(CUSTOM_DESCS)
+        })
+    return boards
+
+def run(build, boards: list, cycles: int) -> float:
+    """متوسط الميكروثانية لكل Board"""
+    start = time.perf_counter()
+    for _ in range(cycles):
+        for b in boards:
+            build(b["ip"], b["port"], b["version"], b["status_info"], b["board"],
+                  None, None, b["style"], b["custom_title"], b["custom_desc"], False)
+    return (time.perf_counter() - start) * 1e6 / (len(boards) * cycles)
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"boards={count} cycles={cycles}")
+
+    for name, unique in (("shared templates", False), ("unique templates", True)):
+        boards = make_boards(count, unique)
+        main.embed_templates.clear()
+
+        # دورة تسخين حتى تُبنى القوالب مرة واحدة
+        run(main.build_embed, boards, 1)
+
+        legacy = run(legacy_build_embed, boards, cycles)
+        cached = run(main.build_embed, boards, cycles)
+
+        print(f"\n[{name}]")
+        print(f"legacy build_embed : {legacy:8.2f} µs/board  ({legacy * count / 1000:8.1f} ms/cycle)")
+        print(f"cached build_embed : {cached:8.2f} µs/board  ({cached * count / 1000:8.1f} ms/cycle)")
+        print(f"speedup            : {legacy / cached:8.2f}x")
+        print(f"templates cached   : {len(main.embed_templates)}")
@@ -8,28 +8,95 @@ import asyncio
 import os
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from threading import Thread
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from threading import Thread, Lock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import time
+import secrets
+import sqlite3
+import zlib
+import math
+import socket
+import atexit
+import heapq
+import re
+import cProfile
+import pstats
+import io
+import tracemalloc
+import threading
+from collections import deque
+from functools import lru_cache
 from typing import Optional, Dict, Any
+from urllib.parse import parse_qs
 
 # تحميل متغيرات البيئة
 load_dotenv()
 TOKEN = os.getenv("TOKEN")
 
 # إعدادات البوت
+class NiwardTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """مع عدة نسخ بنفس التوكن كل نسخة تستلم كل أمر: ترد فقط مالكة القناة (راجع LeaseManager)"""
+        return owns_channel(interaction.channel_id)
+
 intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = commands.Bot(command_prefix="!", intents=intents, tree_cls=NiwardTree)
 bot.remove_command("help")
 
 # ملفات البيانات
 DATA_FILE = "servers.json"
 STATS_FILE = "stats.json"
+CHANNELS_FILE = "channels.json"
+GUILDS_FILE = "guilds.json"
+
+# حدود السيرفرات واللوحات المجمعة
+MAX_SERVERS_PER_USER = 10
+BOARD_MAX_FIELDS = 25  # حد Discord لعدد الحقول في الـ Embed
+BOARD_NAME_LIMIT = 100  # اسم الـ Board داخل اللوحة (حد Discord لاسم الحقل 256)
+EMBED_MAX_CHARS = 6000  # حد Discord لمجموع نصوص الـ Embed
 
 # نظام Cache للتحقق من حالة السيرفر
 status_cache = {}
 CACHE_DURATION = 30  # 30 ثانية
 
+# الفحص: API الاحتياطي والمهلة، والانتظار بين تعديلات الرسائل
+MCSRVSTAT_API = os.getenv("MCSRVSTAT_API", "https://api.mcsrvstat.us/2/")
+PROBE_TIMEOUT = float(os.getenv("PROBE_TIMEOUT", 8))
+SOCKET_TIMEOUT = PROBE_TIMEOUT * 7 / 8  # داخل الـ thread، ينتهي قبل wait_for
+EDIT_DELAY = float(os.getenv("EDIT_DELAY", 1))
+
+# نظام Heartbeat: السيرفرات التي ترسل حالتها بنفسها لا تحتاج فحص
+heartbeats = {}  # server_id -> (time, status_info)
+HEARTBEAT_TIMEOUT = int(os.getenv("HEARTBEAT_TIMEOUT", 180))  # بعدها نرجع للفحص
+HEARTBEAT_MAX_BODY = 8192
+
+# Status API: آخر حالة معروفة لكل سيرفر (للقراءة فقط، لا تبدأ أي فحص)
+STATUS_API_ENABLED = os.getenv("STATUS_API", "1") == "1"
+
+# تشغيل عدة نسخ: القنوات تتوزع على Leases في ملف SQLite مشترك
+LEASE_DB = os.getenv("LEASE_DB")  # بدونه تعمل نسخة واحدة تملك كل شيء
+LEASE_PARTITIONS = int(os.getenv("LEASE_PARTITIONS", 16))
+LEASE_TTL = int(os.getenv("LEASE_TTL", 150))  # أطول من دورة التحديث
+INSTANCE_ID = os.getenv("INSTANCE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+# الجدولة العادلة بين السيرفرات (Guilds): 0 = بدون حد
+GUILD_QUOTA_WINDOW = int(os.getenv("GUILD_QUOTA_WINDOW", 60))
+GUILD_PROBE_LIMIT = int(os.getenv("GUILD_PROBE_LIMIT", 0))  # فحوصات لكل نافذة
+GUILD_EDIT_LIMIT = int(os.getenv("GUILD_EDIT_LIMIT", 0))    # تعديلات رسائل لكل نافذة
+
+# تنبيهات تغيّر الحالة: تُجمع لكل قناة وتُرسل كرسالة واحدة
+NOTIFY_WINDOW = int(os.getenv("NOTIFY_WINDOW", 30))                # ثواني التجميع
+NOTIFY_MAX_PER_HOUR = int(os.getenv("NOTIFY_MAX_PER_HOUR", 6))     # حد الرسائل لكل قناة
+NOTIFY_MAX_CHARS = 2000  # حد Discord لطول الرسالة
+NOTIFY_NAME_LIMIT = 40   # اسم الـ Board داخل التنبيه
+
+# أدوات التحليل (cProfile / tracemalloc) للبوت أثناء التشغيل
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # بدونه يتم تعطيل /admin/profile
+
+# مدراء البوت (للأوامر الإدارية) بالإضافة لمالك التطبيق
+ADMIN_IDS = {int(x) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip().isdigit()}
+
 # ألوان الـ Logs
 class Colors:
     GREEN = "\033[92m"
@@ -155,17 +222,28 @@ STYLES = {
 
 # -------------------------------------------------------------------
 # إدارة البيانات
+def migrate_data(data):
+    """تحويل الصيغة القديمة (سيرفر واحد لكل مستخدم) إلى قائمة سيرفرات"""
+    for user_id, entry in list(data.items()):
+        if "servers" in entry:
+            continue
+        # معرّف السيرفر القديم = user_id حتى تبقى الإحصائيات القديمة مرتبطة به
+        entry.setdefault("name", "main")
+        data[user_id] = {"selected": user_id, "servers": {user_id: entry}}
+    return data
+
 def load_data():
     if os.path.exists(DATA_FILE):
         try:
             with open(DATA_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
+                return migrate_data(json.load(f))
         except:
             log("❌ خطأ في تحميل servers.json", Colors.RED)
             return {}
     return {}
 
 def save_data(data):
+    share_rows("user", data)
     try:
         with open(DATA_FILE, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
@@ -184,34 +262,562 @@ def load_stats():
     return {}
 
 def save_stats(data):
+    share_rows("stats", data)
     try:
         with open(STATS_FILE, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
     except Exception as e:
         log(f"❌ خطأ في حفظ الإحصائيات: {e}", Colors.RED)
 
+def load_channels():
+    if os.path.exists(CHANNELS_FILE):
+        try:
+            with open(CHANNELS_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except:
+            log("❌ خطأ في تحميل channels.json", Colors.RED)
+            return {}
+    return {}
+
+def save_channels(data):
+    share_rows("channel", data)
+    try:
+        with open(CHANNELS_FILE, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+    except Exception as e:
+        log(f"❌ خطأ في حفظ القنوات: {e}", Colors.RED)
+
+def load_guilds():
+    if os.path.exists(GUILDS_FILE):
+        try:
+            with open(GUILDS_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except:
+            log("❌ خطأ في تحميل guilds.json", Colors.RED)
+            return {}
+    return {}
+
+def save_guilds(data):
+    share_rows("guild", data)
+    try:
+        with open(GUILDS_FILE, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+    except Exception as e:
+        log(f"❌ خطأ في حفظ إعدادات السيرفرات: {e}", Colors.RED)
+
 servers_data = load_data()
 stats_data = load_stats()
+channels_data = load_channels()
+guilds_data = load_guilds()  # guild_id -> {"weight", "probe_limit", "edit_limit"}
+
+# -------------------------------------------------------------------
+# الوصول للسيرفرات (عدة سيرفرات لكل مستخدم)
+def iter_servers():
+    """كل السيرفرات المسجلة كـ (user_id, server_id, info)"""
+    for user_id, entry in list(servers_data.items()):
+        for server_id, info in list(entry.get("servers", {}).items()):
+            yield user_id, server_id, info
+
+def get_server(server_id: str) -> Optional[Dict[str, Any]]:
+    """السيرفر حسب معرّفه (المعرّف يبدأ دائماً بـ user_id)"""
+    user_id = server_id.split("_", 1)[0]
+    return servers_data.get(user_id, {}).get("servers", {}).get(server_id)
+
+def get_selected_server(user_id: str) -> Optional[Dict[str, Any]]:
+    """السيرفر المختار حالياً للمستخدم (أو None)"""
+    entry = servers_data.get(user_id)
+    if not entry:
+        return None
+    info = entry.get("servers", {}).get(entry.get("selected"))
+    if not info or "ip" not in info:
+        return None
+    return info
+
+def find_server_by_name(user_id: str, name: str) -> Optional[str]:
+    """معرّف السيرفر حسب اسمه عند المستخدم"""
+    for server_id, info in servers_data.get(user_id, {}).get("servers", {}).items():
+        if info.get("name") == name:
+            return server_id
+    return None
+
+def new_server_id(user_id: str) -> str:
+    """أول سيرفر يأخذ user_id كمعرّف، والباقي user_id_2 و user_id_3 ..."""
+    servers = servers_data.get(user_id, {}).get("servers", {})
+    if user_id not in servers:
+        return user_id
+    n = 2
+    while f"{user_id}_{n}" in servers:
+        n += 1
+    return f"{user_id}_{n}"
+
+def is_aggregated_channel(channel_id) -> bool:
+    return bool(channels_data.get(str(channel_id), {}).get("aggregate"))
+
+# -------------------------------------------------------------------
+# 💓 نظام Heartbeat (Push)
+# token -> server_id (يُبنى عند التشغيل ويُحدّث من /رمز_النبض)
+heartbeat_tokens = {}
+
+def rebuild_heartbeat_tokens():
+    heartbeat_tokens.clear()
+    heartbeat_tokens.update({
+        info["heartbeat_token"]: server_id
+        for _, server_id, info in iter_servers() if info.get("heartbeat_token")
+    })
+
+rebuild_heartbeat_tokens()
+push_targets = set()  # السيرفرات التي توقف فحصها لأنها ترسل Heartbeat
+
+def ingest_heartbeat(token: str, payload: Any):
+    """تسجيل Heartbeat قادم من السيرفر، يرجع (HTTP code, response)"""
+    server_id = heartbeat_tokens.get(token or "")
+    if server_id is None:
+        return 401, {"error": "invalid token"}
+    if not isinstance(payload, dict):
+        return 400, {"error": "body must be a JSON object"}
+
+    try:
+        players = int(payload.get("players", 0))
+        max_players = int(payload.get("max_players", 0))
+        tps = payload.get("tps")
+        tps = round(float(tps), 1) if tps is not None else None
+    except (TypeError, ValueError):
+        return 400, {"error": "players, max_players and tps must be numbers"}
+
+    motd = normalize_motd(payload.get("motd", ""))[:256]
+    status = "standby" if payload.get("status") == "standby" else "online"
+
+    result = {
+        "online": status == "online",
+        "players": players if status == "online" else 0,
+        "latency": 0,
+        "status": status,
+        "motd": motd,
+        "max_players": max_players if status == "online" else 0,
+        "tps": tps,
+        "source": "push"
+    }
+    heartbeats[server_id] = (time.time(), result)
+    record_heartbeat(server_id)
+
+    info = get_server(server_id)
+    if info and not info.get("maintenance"):
+        publish_status(server_id, info, result)
+    return 200, {"ok": True, "timeout": HEARTBEAT_TIMEOUT}
+
+def get_heartbeat_status(server_id: str) -> Optional[Dict[str, Any]]:
+    """آخر Heartbeat إذا كان حديثاً، وإلا None (والسيرفر يرجع للفحص)"""
+    entry = heartbeats.get(server_id)
+    if entry and time.time() - entry[0] < HEARTBEAT_TIMEOUT:
+        if server_id not in push_targets:
+            push_targets.add(server_id)
+            log(f"💓 {server_id} يرسل Heartbeat - تم إيقاف الفحص", Colors.BLUE)
+        return entry[1]
+
+    if server_id in push_targets:
+        push_targets.discard(server_id)
+        heartbeats.pop(server_id, None)
+        log(f"⚠️ انقطع Heartbeat لـ {server_id} - الرجوع للفحص", Colors.YELLOW)
+    return None
+
+# -------------------------------------------------------------------
+# 📡 Status API (JSON للمواقع والأدوات الخارجية)
+# server_id -> السجل العام، والـ seq يزيد فقط عند تغيّر المحتوى
+status_board = {}
+status_seq = 0
+status_epoch = secrets.token_hex(4)  # يتغير مع كل تشغيل لأن الـ seq يبدأ من الصفر
+status_floor = 0  # أي cursor أقدم من هذا يأخذ نسخة كاملة (بعد حذف tombstones قديمة)
+STATUS_TOMBSTONE_TTL = int(os.getenv("STATUS_TOMBSTONE_TTL", 86400))
+status_lock = Lock()  # الـ HTTP يعمل في threads منفصلة
+
+def publish_status(server_id: str, info: Dict[str, Any], status_info: Dict[str, Any]):
+    """تسجيل آخر حالة للسيرفر (يستدعيها الـ poller والـ Heartbeat فقط)"""
+    global status_seq
+    record = {
+        "id": server_id,
+        "name": info.get("name", "main"),
+        "board": info.get("board", "Vanilla Survival"),
+        "ip": info.get("ip"),
+        "port": info.get("port"),
+        "version": info.get("version", "غير محددة"),
+        "status": "maintenance" if info.get("maintenance") else status_info.get("status", "offline"),
+        "players": status_info.get("players", 0),
+        "max_players": status_info.get("max_players", 0),
+        "motd": status_info.get("motd", ""),
+        "tps": status_info.get("tps"),
+        "source": status_info.get("source", "probe"),
+    }
+    with status_lock:
+        old = status_board.get(server_id)
+        if old and all(old.get(k) == v for k, v in record.items()):
+            return
+        status_seq += 1
+        record["seq"] = status_seq
+        record["changed_at"] = datetime.now().isoformat()
+        status_board[server_id] = record
+
+def unpublish_status(server_id: str):
+    """حذف السيرفر من الـ API (يبقى كـ removed حتى يراه من يستخدم since)"""
+    global status_seq
+    with status_lock:
+        if server_id not in status_board:
+            return
+        status_seq += 1
+        status_board[server_id] = {"id": server_id, "removed": True, "seq": status_seq,
+                                   "removed_at": datetime.now().isoformat()}
+
+def prune_status_tombstones():
+    """حذف tombstones أقدم من STATUS_TOMBSTONE_TTL، ومن يملك cursor أقدم منها يأخذ نسخة كاملة"""
+    global status_floor
+    cutoff = (datetime.now() - timedelta(seconds=STATUS_TOMBSTONE_TTL)).isoformat()
+    with status_lock:
+        expired = [sid for sid, r in status_board.items() if r.get("removed") and r["removed_at"] < cutoff]
+        for server_id in expired:
+            status_floor = max(status_floor, status_board.pop(server_id)["seq"])
+    return len(expired)
+
+def status_api_response(path: str, query: Dict[str, list]):
+    """يرجع (HTTP code, ETag, payload) بدون أي فحص للسيرفرات"""
+    with status_lock:
+        if path in ("/api/status", "/api/status/"):
+            # الـ cursor بصيغة "epoch:seq"، وأي cursor من تشغيل سابق يأخذ نسخة كاملة
+            epoch, _, seq = query.get("since", [""])[0].rpartition(":")
+            try:
+                since = int(seq or 0)
+            except ValueError:
+                return 400, None, {"error": "since must be a cursor returned by this API"}
+            full = not since or epoch != status_epoch or since > status_seq or since < status_floor
+            if full:
+                since = 0
+                servers = [dict(r) for r in status_board.values() if not r.get("removed")]
+            else:
+                servers = [dict(r) for r in status_board.values() if r["seq"] > since]
+            return 200, f'"{status_epoch}-{status_seq}-{since}"', {
+                "cursor": f"{status_epoch}:{status_seq}", "full": full, "servers": servers
+            }
+
+        server_id = path[len("/api/status/"):]
+        record = status_board.get(server_id)
+        if record is None or record.get("removed"):
+            return 404, None, {"error": "not found"}
+        return 200, f'"{status_epoch}-{record["seq"]}"', dict(record)
+
+# -------------------------------------------------------------------
+# ⚡ الحالة السريعة: تُعرض من آخر نتيجة بدل فحص جديد لكل ضغطة
+QUICK_MAX_AGE = int(os.getenv("QUICK_MAX_AGE", 180))              # أقدم نتيجة تُعرض بدون تحديث
+QUICK_USER_COOLDOWN = int(os.getenv("QUICK_USER_COOLDOWN", 5))     # بين استخدامين لنفس الشخص
+QUICK_TARGET_COOLDOWN = int(os.getenv("QUICK_TARGET_COOLDOWN", 30))  # بين فحصين لنفس السيرفر
+latest_status = {}  # server_id -> (الوقت, آخر نتيجة فحص)
+refresh_tasks = {}  # server_id -> Task (فحص واحد في الخلفية لكل سيرفر)
+refresh_times = {}  # server_id -> وقت بدء آخر فحص
+quick_users = {}    # user_id -> وقت آخر استخدام
+
+def get_latest_status(server_id: str):
+    """أحدث نتيجة معروفة (Heartbeat أو فحص) مع وقتها، أو None"""
+    entries = [e for e in (heartbeats.get(server_id), latest_status.get(server_id)) if e]
+    return max(entries, key=lambda e: e[0]) if entries else None
+
+async def refresh_status(server_id: str, info: Dict[str, Any]):
+    try:
+        status = await check_server_status_smart(info["ip"], info["port"], tuple(info.get("standby_keywords", ())))
+        latest_status[server_id] = (time.time(), status)
+    finally:
+        refresh_tasks.pop(server_id, None)
+
+def schedule_refresh(server_id: str, info: Dict[str, Any]) -> bool:
+    """يبدأ فحصاً في الخلفية إذا لم يكن هناك فحص جارٍ ولم ينتهِ الـ cooldown (True = يوجد فحص جارٍ)"""
+    if server_id in refresh_tasks:
+        return True
+    now = time.time()
+    if now - refresh_times.get(server_id, 0) < QUICK_TARGET_COOLDOWN:
+        return False
+    refresh_times[server_id] = now
+    refresh_tasks[server_id] = asyncio.create_task(refresh_status(server_id, info))
+    return True
+
+def last_known_status(server_id: str, info: Dict[str, Any]) -> Dict[str, Any]:
+    """آخر نتيجة بدون أي فحص (للسيرفرات المؤجلة)"""
+    latest = get_latest_status(server_id)
+    if latest:
+        return latest[1]
+    record = status_board.get(server_id)
+    if record and not record.get("removed"):
+        return record
+    status = info.get("last_status")
+    return {"status": status if status in ("online", "standby") else "offline",
+            "players": 0, "max_players": 0, "latency": 0}
+
+def format_age(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"منذ {seconds} ثانية"
+    if seconds < 3600:
+        return f"منذ {seconds // 60} دقيقة"
+    return f"منذ {seconds // 3600} ساعة"
+
+# -------------------------------------------------------------------
+# 🔬 التحليل أثناء التشغيل (cProfile حول دورات update_servers + tracemalloc)
+class Profiler:
+    def __init__(self, report_dir: str):
+        self.report_dir = report_dir
+        self.lock = Lock()  # الطلبات تأتي من الـ HTTP thread ومن الأوامر
+        self.pending_cycles = 0
+        self.remaining = 0
+        self.profile = None
+        self.last_snapshot = None
+
+    def _path(self, kind: str, ext: str) -> str:
+        os.makedirs(self.report_dir, exist_ok=True)
+        return os.path.join(self.report_dir, f"{kind}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{ext}")
+
+    def request_cprofile(self, cycles: int) -> str:
+        with self.lock:
+            if self.profile or self.pending_cycles:
+                return "⚠️ يوجد تحليل cProfile قيد التشغيل"
+            self.pending_cycles = max(1, min(cycles, 60))
+            return f"✅ سيبدأ cProfile مع الدورة القادمة لمدة {self.pending_cycles} دورة"
+
+    def cycle_start(self):
+        with self.lock:
+            if self.pending_cycles and not self.profile:
+                self.remaining = self.pending_cycles
+                self.pending_cycles = 0
+                self.profile = cProfile.Profile()
+                self.profile.enable()
+                log(f"🔬 cProfile بدأ ({self.remaining} دورة)", Colors.BLUE)
+
+    def cycle_end(self):
+        with self.lock:
+            if not self.profile:
+                return
+            self.remaining -= 1
+            if self.remaining > 0:
+                return
+            profile, self.profile = self.profile, None
+
+        profile.disable()
+        # يُستدعى في نهاية update_servers: فشل الكتابة لا يجب أن يوقف الحلقة
+        try:
+            raw_path = self._path("cprofile", "prof")
+            profile.dump_stats(raw_path)
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(60)
+            with open(raw_path[:-5] + ".txt", "w", encoding="utf-8") as f:
+                f.write(out.getvalue())
+        except OSError as e:
+            log(f"❌ فشل حفظ تقرير cProfile في {self.report_dir}: {e}", Colors.RED)
+            return
+        log(f"🔬 تقرير cProfile: {raw_path}", Colors.GREEN)
+
+    def memory_summary(self) -> str:
+        """أحجام الهياكل التي قد تكبر مع الوقت"""
+        # يُستدعى من الـ HTTP thread: نسخة من القيم حتى لا يتغير الـ dict أثناء المرور عليه
+        status_changes = sum(len(s.get("status_changes", [])) for s in list(stats_data.values()))
+        return (
+            f"threads={threading.active_count()} status_cache={len(status_cache)} "
+            f"stats={len(stats_data)} status_changes={status_changes} "
+            f"heartbeats={len(heartbeats)} status_board={len(status_board)} "
+            f"message_index={len(message_index)} notifications={len(notification_queue)}"
+        )
+
+    def snapshot(self, diff: bool = False) -> str:
+        """snapshot من tracemalloc، ومع diff يقارن بالـ snapshot السابق"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            return "✅ تم تشغيل tracemalloc، خذ snapshot بعد قليل"
+
+        snap = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        with self.lock:
+            previous, self.last_snapshot = self.last_snapshot, snap
+        if diff and previous is None:
+            return "⚠️ لا يوجد snapshot سابق للمقارنة، تم حفظ هذا كبداية"
+
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [
+            f"# {datetime.now().isoformat()} current={current / 1e6:.1f}MB peak={peak / 1e6:.1f}MB",
+            f"# {self.memory_summary()}",
+            ""
+        ]
+        if diff:
+            lines += [str(stat) for stat in snap.compare_to(previous, "lineno")[:50]]
+        else:
+            lines += [str(stat) for stat in snap.statistics("lineno")[:50]]
+
+        try:
+            path = self._path("tracemalloc-diff" if diff else "tracemalloc", "txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+        except OSError as e:
+            return f"❌ فشل حفظ التقرير في {self.report_dir}: {e}"
+        return f"✅ التقرير: `{path}` ({current / 1e6:.1f}MB)"
+
+    def stop(self) -> str:
+        with self.lock:
+            self.pending_cycles = 0
+            self.last_snapshot = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        # cProfile الجاري يكمل دوراته ويكتب تقريره
+        return "✅ تم إيقاف tracemalloc"
+
+    def run(self, action: str, cycles: int = 3) -> str:
+        if action == "cprofile":
+            return self.request_cprofile(cycles)
+        if action == "snapshot":
+            return self.snapshot()
+        if action == "diff":
+            return self.snapshot(diff=True)
+        if action == "stop":
+            return self.stop()
+        if action == "status":
+            state = "cProfile يعمل" if self.profile else ("cProfile في الانتظار" if self.pending_cycles else "cProfile متوقف")
+            tracing = "tracemalloc يعمل" if tracemalloc.is_tracing() else "tracemalloc متوقف"
+            return f"{state} | {tracing}\n{self.memory_summary()}"
+        return "❌ إجراء غير معروف"
+
+profiler = Profiler(PROFILE_DIR)
 
 # ✅ HTTP Server للـ Railway Health Check
 class HealthCheckHandler(BaseHTTPRequestHandler):
     def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if STATUS_API_ENABLED and path.startswith("/api/status"):
+            self.handle_status_api(path, parse_qs(query))
+            return
+
         self.send_response(200)
         self.send_header('Content-type', 'text/plain')
         self.end_headers()
         self.wfile.write(b'Niward v1.6 is running!')
+
+    def handle_status_api(self, path: str, query: Dict[str, list]):
+        code, etag, payload = status_api_response(path, query)
+        if etag and etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+
+        headers = {"Access-Control-Allow-Origin": "*", "Cache-Control": "no-cache"}
+        if etag:
+            headers["ETag"] = etag
+        self.send_json(code, payload, headers)
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        if path not in ("/heartbeat", "/admin/profile"):
+            self.send_json(404, {"error": "not found"})
+            return
+
+        # التحقق من الرمز قبل قراءة أي شيء من الـ body
+        auth = self.headers.get("Authorization", "")
+        token = auth[7:].strip() if auth.startswith("Bearer ") else self.headers.get("X-Niward-Token")
+        if path == "/admin/profile":
+            authorized = bool(ADMIN_TOKEN) and secrets.compare_digest(token or "", ADMIN_TOKEN)
+        else:
+            authorized = (token or "") in heartbeat_tokens
+        if not authorized:
+            self.send_json(401, {"error": "invalid token"}, {"Connection": "close"})
+            self.close_connection = True
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_json(400, {"error": "invalid Content-Length"}, {"Connection": "close"})
+            self.close_connection = True
+            return
+        if length > HEARTBEAT_MAX_BODY:
+            self.send_json(413, {"error": "body too large"}, {"Connection": "close"})
+            self.close_connection = True
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json(400, {"error": "invalid JSON"})
+            return
+
+        if path == "/admin/profile":
+            try:
+                cycles = int(payload.get("cycles", 3))
+            except (TypeError, ValueError, AttributeError):
+                self.send_json(400, {"error": "cycles must be an integer"})
+                return
+            self.send_json(200, {"result": profiler.run(str(payload.get("action", "status")), cycles)})
+            return
+
+        code, body = ingest_heartbeat(token, payload)
+        self.send_json(code, body)
+
+    def send_json(self, code: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
     def log_message(self, format, *args):
         pass
 
 def run_health_server():
     port = int(os.getenv("PORT", 8080))
-    server = HTTPServer(('0.0.0.0', port), HealthCheckHandler)
+    server = ThreadingHTTPServer(('0.0.0.0', port), HealthCheckHandler)
     log(f"✅ Health check server running on port {port}", Colors.GREEN)
     server.serve_forever()
 
+# -------------------------------------------------------------------
+# 🏷️ تصنيف الـ MOTD (Standby / Aternos)
+DEFAULT_STANDBY_KEYWORDS = ("starting", "preparing", "aternos", "loading", "booting")
+MAX_STANDBY_KEYWORDS = 20
+FORMATTING_CODE = re.compile(r"§[0-9a-fk-orx]", re.IGNORECASE)
+
+def chat_to_text(component: Any) -> str:
+    """تحويل JSON chat component (نص / dict / list) لنص عادي"""
+    if isinstance(component, str):
+        return component
+    if isinstance(component, list):
+        return "".join(chat_to_text(part) for part in component)
+    if isinstance(component, dict):
+        return chat_to_text(component.get("text", "")) + chat_to_text(component.get("extra", []))
+    return str(component or "")
+
+@lru_cache(maxsize=4096)
+def strip_formatting(text: str) -> str:
+    """حذف أكواد التنسيق § من الـ MOTD"""
+    return FORMATTING_CODE.sub("", text).strip()
+
+def normalize_motd(description: Any) -> str:
+    return strip_formatting(chat_to_text(description))
+
+@lru_cache(maxsize=256)
+def standby_pattern(keywords: tuple):
+    """Pattern واحد مجمّع للكلمات الافتراضية + كلمات الـ Board"""
+    words = sorted({k.lower() for k in DEFAULT_STANDBY_KEYWORDS + keywords if k}, key=len, reverse=True)
+    return re.compile("|".join(re.escape(w) for w in words))
+
+@lru_cache(maxsize=4096)
+def is_standby_motd(motd: str, keywords: tuple = ()) -> bool:
+    """الـ MOTD غالباً نفسه كل دورة، فالنتيجة محفوظة حسب الـ hash"""
+    return standby_pattern(keywords).search(motd.lower()) is not None
+
+def parse_keywords(text: str) -> tuple:
+    """"a, b ,c" -> ("a", "b", "c")"""
+    return tuple(dict.fromkeys(
+        word.strip().lower() for word in text.split(",") if word.strip()
+    ))[:MAX_STANDBY_KEYWORDS]
+
 # -------------------------------------------------------------------
 # 🧠 نظام التحقق الذكي من حالة السيرفر (Smart Server Detection)
-async def check_server_status_smart(ip: str, port: str) -> Dict[str, Any]:
+async def check_server_status_smart(ip: str, port: str, standby_keywords: tuple = ()) -> Dict[str, Any]:
     """
     نظام فحص ذكي يميز بين:
     - online: السيرفر متصل وجاهز 100%
@@ -220,10 +826,12 @@ async def check_server_status_smart(ip: str, port: str) -> Dict[str, Any]:
     - maintenance: تحت الصيانة (من المستخدم)
     """
     server_key = f"{ip}:{port}"
+    # الكلمات المخصصة تغيّر التصنيف، فتدخل في مفتاح الـ Cache
+    cache_key = f"{server_key}|{','.join(standby_keywords)}" if standby_keywords else server_key
     
     # التحقق من الـ Cache
-    if server_key in status_cache:
-        cache_time, cache_data = status_cache[server_key]
+    if cache_key in status_cache:
+        cache_time, cache_data = status_cache[cache_key]
         if time.time() - cache_time < CACHE_DURATION:
             return cache_data
     
@@ -239,23 +847,25 @@ async def check_server_status_smart(ip: str, port: str) -> Dict[str, Any]:
     # المحاولة الأولى: mcstatus
     mcstatus_ok = False
     try:
-        server = JavaServer.lookup(server_key)
+        # المهلة داخل الـ socket نفسه، حتى لا يبقى الـ thread معلقاً بعد wait_for
+        server = JavaServer.lookup(server_key, timeout=SOCKET_TIMEOUT)
         status = await asyncio.wait_for(
             asyncio.to_thread(server.status), 
-            timeout=8
+            timeout=PROBE_TIMEOUT
         )
         
         players = getattr(status.players, "online", 0)
         max_players = getattr(status.players, "max", 0)
         latency = int(getattr(status, "latency", 0))
-        motd = str(getattr(status, "description", ""))
+        # الـ raw يحتوي الـ chat component الأصلي قبل أي تحويل
+        raw = getattr(status, "raw", None)
+        description = raw.get("description", "") if isinstance(raw, dict) else getattr(status, "description", "")
+        motd = normalize_motd(description)
         
         mcstatus_ok = True
         
         # تحليل MOTD للكشف عن حالة Standby
-        motd_lower = motd.lower()
-        standby_keywords = ["starting", "preparing", "aternos", "loading", "booting"]
-        is_standby = any(keyword in motd_lower for keyword in standby_keywords)
+        is_standby = is_standby_motd(motd, standby_keywords)
         
         if is_standby or (players == 0 and max_players == 0):
             result["status"] = "standby"
@@ -276,19 +886,17 @@ async def check_server_status_smart(ip: str, port: str) -> Dict[str, Any]:
     if not mcstatus_ok:
         try:
             response = await asyncio.wait_for(
-                asyncio.to_thread(requests.get, f"https://api.mcsrvstat.us/2/{ip}"),
-                timeout=8
+                asyncio.to_thread(requests.get, f"{MCSRVSTAT_API}{ip}", timeout=SOCKET_TIMEOUT),
+                timeout=PROBE_TIMEOUT
             )
             data = response.json()
             
             if data.get("online"):
                 players = data.get("players", {}).get("online", 0)
                 max_players = data.get("players", {}).get("max", 0)
-                motd = str(data.get("motd", {}).get("clean", [""])[0])
+                motd = normalize_motd("\n".join(data.get("motd", {}).get("clean", [])))
                 
-                motd_lower = motd.lower()
-                standby_keywords = ["starting", "preparing", "aternos", "loading"]
-                is_standby = any(keyword in motd_lower for keyword in standby_keywords)
+                is_standby = is_standby_motd(motd, standby_keywords)
                 
                 if is_standby or (players == 0 and max_players == 0):
                     result["status"] = "standby"
@@ -308,72 +916,190 @@ async def check_server_status_smart(ip: str, port: str) -> Dict[str, Any]:
         result["status"] = "offline"
     
     # حفظ في الـ Cache
-    status_cache[server_key] = (time.time(), result)
+    status_cache[cache_key] = (time.time(), result)
     
     return result
 
 # -------------------------------------------------------------------
 # تسجيل تغيير الحالة في الإحصائيات
-def log_status_change(user_id: str, old_status: str, new_status: str):
+def log_status_change(server_id: str, old_status: str, new_status: str):
     """تسجيل تغيير حالة السيرفر"""
-    if user_id not in stats_data:
-        stats_data[user_id] = {
-            "total_checks": 0,
-            "uptime_sessions": [],
-            "downtime_sessions": [],
-            "status_changes": [],
-            "maintenance_count": 0,
-            "total_maintenance_time": 0,
-            "last_maintenance_start": None
-        }
+    stats = stats_data.setdefault(server_id, {})
+    for key, default in (("total_checks", 0), ("uptime_sessions", []), ("downtime_sessions", []),
+                         ("status_changes", []), ("maintenance_count", 0),
+                         ("total_maintenance_time", 0), ("last_maintenance_start", None)):
+        stats.setdefault(key, default)
     
-    stats_data[user_id]["status_changes"].append({
+    stats_data[server_id]["status_changes"].append({
         "from": old_status,
         "to": new_status,
         "time": datetime.now().isoformat()
     })
     
     # الاحتفاظ بآخر 100 تغيير فقط
-    if len(stats_data[user_id]["status_changes"]) > 100:
-        stats_data[user_id]["status_changes"] = stats_data[user_id]["status_changes"][-100:]
+    if len(stats_data[server_id]["status_changes"]) > 100:
+        stats_data[server_id]["status_changes"] = stats_data[server_id]["status_changes"][-100:]
     
     save_stats(stats_data)
 
+# -------------------------------------------------------------------
+# 📈 سجل عدد اللاعبين (Sparkline لآخر 24 ساعة)
+HISTORY_BUCKET = 3600   # ساعة لكل عمود
+HISTORY_BUCKETS = 24
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+sparkline_cache = {}  # server_id -> (آخر bucket, النص)
+
+def record_players_sample(server_id: str, players: int):
+    """إضافة عينة لعمود الساعة الحالية: [bucket, المجموع, العدد, الذروة]"""
+    history = stats_data.setdefault(server_id, {}).setdefault("player_history", [])
+    bucket = int(time.time() // HISTORY_BUCKET)
+    if history and history[-1][0] == bucket:
+        entry = history[-1]
+        entry[1] += players
+        entry[2] += 1
+        entry[3] = max(entry[3], players)
+    else:
+        history.append([bucket, players, 1, players])
+        # حسب عمر العمود لا عددها: بعد التوقف لا تبقى أعمدة أقدم من 24 ساعة
+        while history[0][0] <= bucket - HISTORY_BUCKETS:
+            history.pop(0)
+
+def get_history_line(server_id: str) -> Optional[str]:
+    """النص يُعاد بناؤه فقط عند بدء عمود جديد"""
+    history = stats_data.get(server_id, {}).get("player_history")
+    if not history:
+        return None
+    latest = history[-1][0]
+    cached = sparkline_cache.get(server_id)
+    if cached and cached[0] == latest:
+        return cached[1]
+
+    window = [entry for entry in history if entry[0] > latest - HISTORY_BUCKETS]
+    by_bucket = {entry[0]: entry for entry in window}
+    averages = [
+        by_bucket[b][1] / by_bucket[b][2] if b in by_bucket else None
+        for b in range(latest - HISTORY_BUCKETS + 1, latest + 1)
+    ]
+    top = max((a for a in averages if a is not None), default=0) or 1
+    spark = "".join(
+        " " if a is None else SPARK_CHARS[min(int(a / top * (len(SPARK_CHARS) - 1)), len(SPARK_CHARS) - 1)]
+        for a in averages
+    )
+    peak = max(entry[3] for entry in window)
+    avg = sum(entry[1] for entry in window) / sum(entry[2] for entry in window)
+    line = f"`{spark}`\n🔝 الذروة: **{peak}** | 📊 المتوسط: **{avg:.1f}**"
+
+    sparkline_cache[server_id] = (latest, line)
+    return line
+
+# -------------------------------------------------------------------
+# قوالب الـ Embed: تُبنى مرة واحدة لكل (style, status, custom_title, custom_desc)
+# والقيم المتغيرة فقط تُملأ في كل تحديث
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+DESC_PLACEHOLDERS = ("ip", "port", "version", "players", "max_players", "latency")
+TITLE_PLACEHOLDERS = ("status",) + DESC_PLACEHOLDERS
+
+BASE_TEMPLATES = {
+    "maintenance": ("السيرفر تحت الصيانة", "🚧 الرجاء العودة لاحقاً - جاري تحديث السيرفر"),
+    "online": ("السيرفر أونلاين",
+               "**IP:** `{ip}`\n**Port:** `{port}`\n**Version:** {version}\n"
+               "**Players:** {players}/{max_players}\n**Ping:** {latency}ms"),
+    "standby": ("السيرفر في وضع الاستعداد",
+                "**IP:** `{ip}`\n**Port:** `{port}`\n**Version:** {version}\n⏳ السيرفر يتحمل أو في وضع Starting..."),
+    "offline": ("السيرفر أوفلاين",
+                "**IP:** `{ip}`\n**Port:** `{port}`\n**Version:** {version}\n❌ السيرفر غير متصل حالياً"),
+}
+
+def invalid_placeholders(text: str, allowed: tuple) -> list:
+    """الـ placeholders غير المعروفة في نص المستخدم"""
+    return sorted({name for name in PLACEHOLDER.findall(text or "") if name not in allowed})
+
+def _escape_braces(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+def compile_template(text: str, allowed: tuple, static: Dict[str, str] = None) -> str:
+    """
+    تحويل نص المستخدم لـ format string جاهز لـ format_map:
+    القيم في static تُملأ الآن، والـ placeholders غير المعروفة والأقواس تبقى نصاً كما هي
+    """
+    static = static or {}
+    parts = []
+    pos = 0
+    for match in PLACEHOLDER.finditer(text):
+        parts.append(_escape_braces(text[pos:match.start()]))
+        name = match.group(1)
+        if name in static:
+            parts.append(_escape_braces(static[name]))
+        elif name in allowed:
+            parts.append(match.group(0))
+        else:
+            parts.append(_escape_braces(match.group(0)))
+        pos = match.end()
+    parts.append(_escape_braces(text[pos:]))
+    return "".join(parts)
+
+def render_template(template: str, values: Dict[str, Any]) -> str:
+    return template.format_map(values)
+
+# بدون حد: LRU أصغر من عدد البوردات يفشل في كل مرة لأن الدورة تمر عليها بنفس الترتيب
+# يُمسح عند تغيير النصوص المخصصة (/تخصيص_الرسالة أو من نسخة أخرى)
+embed_templates = {}  # (style, status, custom_title, custom_desc) -> القالب
+
+def get_embed_template(style: str, status: str, custom_title: str = None, custom_desc: str = None):
+    """(title_template, desc_template, color) للاستايل والحالة والنصوص المخصصة"""
+    key = (style, status, custom_title, custom_desc)
+    template = embed_templates.get(key)
+    if template is None:
+        template = embed_templates[key] = compile_embed_template(*key)
+    return template
+
+def compile_embed_template(style: str, status: str, custom_title: Optional[str], custom_desc: Optional[str]):
+    style_data = STYLES.get(style, STYLES["classic"])
+    if status not in BASE_TEMPLATES:
+        status = "offline"
+    base_title, base_desc = BASE_TEMPLATES[status]
+    status_title = f"{style_data['emojis'][status]} {base_title}"
+
+    title = compile_template(
+        f"{style_data['name']} — {custom_title or '{status}'}",
+        TITLE_PLACEHOLDERS,
+        {"status": status_title}
+    )
+    desc = compile_template(custom_desc or base_desc, DESC_PLACEHOLDERS)
+    return title, desc, style_data["colors"][status]
+
+@lru_cache(maxsize=2)
+def _footer_for_minute(minute: int) -> str:
+    now = datetime.now().strftime("%I:%M %p")
+    return f"Niward v1.6 | آخر تحديث: اليوم {now}"
+
+def footer_text() -> str:
+    """الـ Footer يتغير مرة كل دقيقة فقط"""
+    return _footer_for_minute(int(time.time() // 60))
+
 # -------------------------------------------------------------------
 # بناء الـ Embed مع دعم الصيانة
 def build_embed(ip: str, port: str, version: str, status_info: Dict[str, Any], 
                 board: str = "Vanilla Survival", image_url: str = None, 
                 image_pos: str = None, style: str = "classic",
                 custom_title: str = None, custom_desc: str = None,
-                is_maintenance: bool = False):
+                is_maintenance: bool = False, history: str = None):
     
-    style_data = STYLES.get(style, STYLES["classic"])
     status = "maintenance" if is_maintenance else status_info.get("status", "offline")
-    
-    # العنوان والوصف
-    if is_maintenance:
-        title = f"{style_data['emojis']['maintenance']} السيرفر تحت الصيانة"
-        desc = "🚧 الرجاء العودة لاحقاً - جاري تحديث السيرفر"
-    elif status == "online":
-        title = f"{style_data['emojis']['online']} السيرفر أونلاين"
-        desc = f"**IP:** `{ip}`\n**Port:** `{port}`\n**Version:** {version}\n**Players:** {status_info.get('players', 0)}/{status_info.get('max_players', 0)}\n**Ping:** {status_info.get('latency', 0)}ms"
-    elif status == "standby":
-        title = f"{style_data['emojis']['standby']} السيرفر في وضع الاستعداد"
-        desc = f"**IP:** `{ip}`\n**Port:** `{port}`\n**Version:** {version}\n⏳ السيرفر يتحمل أو في وضع Starting..."
-    else:
-        title = f"{style_data['emojis']['offline']} السيرفر أوفلاين"
-        desc = f"**IP:** `{ip}`\n**Port:** `{port}`\n**Version:** {version}\n❌ السيرفر غير متصل حالياً"
-    
-    # استخدام العنوان والوصف المخصص إذا موجود
-    if custom_title:
-        title = custom_title.replace("{status}", title)
-    if custom_desc:
-        desc = custom_desc.replace("{ip}", ip).replace("{port}", port).replace("{version}", version)
-    
+    title_template, desc_template, color = get_embed_template(style, status, custom_title, custom_desc)
+
+    values = {
+        "ip": ip,
+        "port": port,
+        "version": version,
+        "players": status_info.get("players", 0),
+        "max_players": status_info.get("max_players", 0),
+        "latency": status_info.get("latency", 0)
+    }
     embed = discord.Embed(
-        title=f"{style_data['name']} — {title}",
-        description=desc,
-        color=style_data["colors"][status]
+        title=render_template(title_template, values),
+        description=render_template(desc_template, values),
+        color=color
     )
     
     embed.add_field(name="📌 Board", value=board, inline=False)
@@ -382,6 +1108,14 @@ def build_embed(ip: str, port: str, version: str, status_info: Dict[str, Any],
     if status_info.get("motd") and not is_maintenance:
         motd = status_info["motd"][:100]  # أول 100 حرف فقط
         embed.add_field(name="📝 MOTD", value=f"```{motd}```", inline=False)
+
+    # TPS يصل فقط من الـ Heartbeat
+    if status_info.get("tps") is not None and not is_maintenance:
+        embed.add_field(name="⚙️ TPS", value=str(status_info["tps"]), inline=True)
+
+    # سجل اللاعبين (اختياري)
+    if history and not is_maintenance:
+        embed.add_field(name=f"📈 اللاعبين - آخر {HISTORY_BUCKETS} ساعة", value=history, inline=False)
     
     # إضافة الصور
     if image_url and image_pos:
@@ -391,29 +1125,145 @@ def build_embed(ip: str, port: str, version: str, status_info: Dict[str, Any],
             embed.set_image(url=image_url)
     
     # Footer مع الوقت
-    now = datetime.now().strftime("%I:%M %p")
-    embed.set_footer(text=f"Niward v1.6 | آخر تحديث: اليوم {now}")
-    
+    embed.set_footer(text=footer_text())
+
     return embed
 
 # -------------------------------------------------------------------
-# زر الانضمام
+# اللوحة المجمعة: Embed واحد لكل 25 سيرفر في القناة
+def clip(text: Any, limit: int) -> str:
+    """قص النص لحدود Discord"""
+    text = str(text or "")
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+def build_board_embed(entries, style: str = "classic", title: str = None,
+                      page: int = 1, pages: int = 1):
+    """entries: قائمة (info, status_info) لسيرفرات القناة"""
+    style_data = STYLES.get(style, STYLES["classic"])
+
+    counts = {"online": 0, "standby": 0, "offline": 0, "maintenance": 0}
+    for info, status_info in entries:
+        status = "maintenance" if info.get("maintenance") else status_info.get("status", "offline")
+        counts[status] = counts.get(status, 0) + 1
+
+    if counts["online"] == len(entries):
+        color = style_data["colors"]["online"]
+    elif counts["online"] == 0 and counts["standby"] == 0:
+        color = style_data["colors"]["offline"]
+    else:
+        color = style_data["colors"]["standby"]
+
+    header = clip(title or "📊 حالة السيرفرات", 200)
+    if pages > 1:
+        header = f"{header} ({page}/{pages})"
+
+    desc = (
+        f"{style_data['emojis']['online']} {counts['online']} أونلاين | "
+        f"{style_data['emojis']['standby']} {counts['standby']} استعداد | "
+        f"{style_data['emojis']['offline']} {counts['offline']} أوفلاين"
+    )
+    if counts["maintenance"]:
+        desc += f" | {style_data['emojis']['maintenance']} {counts['maintenance']} صيانة"
+
+    embed_title = f"{style_data['name']} — {header}"
+    embed_fields = []
+    footer = footer_text()
+    # مساحة لسطر "سيرفرات لم تتسع" إذا احتجناه
+    budget = EMBED_MAX_CHARS - len(embed_title) - len(desc) - len(footer) - 64
+
+    shown = 0
+    for info, status_info in entries[:BOARD_MAX_FIELDS]:
+        status = "maintenance" if info.get("maintenance") else status_info.get("status", "offline")
+        name = f"{style_data['emojis'][status]} {clip(info.get('board', 'Vanilla Survival'), BOARD_NAME_LIMIT)}"
+        value = f"`{clip(info.get('ip'), 100)}:{info.get('port')}` | {info.get('version', 'غير محددة')}"
+        if status == "online":
+            value += f"\n👥 {status_info.get('players', 0)}/{status_info.get('max_players', 0)} | 📶 {status_info.get('latency', 0)}ms"
+        if len(name) + len(value) > budget:
+            break
+        budget -= len(name) + len(value)
+        embed_fields.append((name, value))
+        shown += 1
+
+    if shown < len(entries[:BOARD_MAX_FIELDS]):
+        desc += f"\n➕ {len(entries[:BOARD_MAX_FIELDS]) - shown} سيرفر آخر لم يتسع في الرسالة"
+
+    embed = discord.Embed(title=embed_title, description=desc, color=color)
+    for name, value in embed_fields:
+        embed.add_field(name=name, value=value, inline=False)
+
+    embed.set_footer(text=footer)
+
+    return embed
+
+# -------------------------------------------------------------------
+# فهرس الرسائل: message_id -> ("server", user_id, server_id) أو ("board", channel_id, page)
+message_index = {}
+
+def index_message(message_id, target: tuple):
+    if message_id:
+        message_index[int(message_id)] = target
+
+def rebuild_message_index():
+    message_index.clear()
+    for user_id, server_id, info in iter_servers():
+        index_message(info.get("message_id"), ("server", user_id, server_id))
+    for channel_id, board_cfg in channels_data.items():
+        for page, message_id in enumerate(board_cfg.get("message_ids", []), 1):
+            index_message(message_id, ("board", channel_id, page))
+
+rebuild_message_index()
+
+def resolve_join_text(message_id: int) -> Optional[str]:
+    """نص رسالة الانضمام حسب الرسالة التي ضُغط زرها"""
+    target = message_index.get(message_id)
+    if target is None:
+        return None
+
+    if target[0] == "server":
+        _, user_id, server_id = target
+        info = servers_data.get(user_id, {}).get("servers", {}).get(server_id)
+        if not info or info.get("message_id") != message_id:
+            return None
+        return (
+            f"📌 **Board:** {info.get('board', 'Vanilla Survival')}\n"
+            f"🌐 **IP:** `{info.get('ip')}`\n"
+            f"🔌 **Port:** `{info.get('port')}`\n\n"
+            f"انسخ الـ IP والبورت والصقهم في Minecraft!"
+        )
+
+    # لوحة مجمعة: سيرفرات الصفحة التي ضُغط زرها (بنفس ترتيب update_channel_board)
+    _, channel_key, page = target
+    channel_id = int(channel_key)
+    servers = [
+        info for _, _, info in iter_servers()
+        if info.get("channel_id") == channel_id and info.get("ip") and info.get("port")
+    ]
+    start = (page - 1) * BOARD_MAX_FIELDS
+    lines = [
+        f"📌 **{info.get('board', 'Vanilla Survival')}** — `{info.get('ip')}:{info.get('port')}`"
+        for info in servers[start:start + BOARD_MAX_FIELDS]
+    ]
+    if not lines:
+        return None
+    return "\n".join(lines) + "\n\nانسخ الـ IP والبورت والصقهم في Minecraft!"
+
+# -------------------------------------------------------------------
+# زر الانضمام: View واحد دائم لكل الرسائل، والسيرفر يُحدد من رقم الرسالة
 class JoinButton(discord.ui.View):
-    def __init__(self, ip, port, board):
+    def __init__(self):
         super().__init__(timeout=None)
-        self.ip = ip
-        self.port = port
-        self.board = board
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return owns_channel(interaction.channel_id)
 
     @discord.ui.button(label="انضمام", style=discord.ButtonStyle.green, custom_id="join_server_btn")
     async def join(self, interaction: discord.Interaction, button: discord.ui.Button):
+        text = resolve_join_text(interaction.message.id)
+        if text is None:
+            await interaction.response.send_message("❌ هذا السيرفر لم يعد مسجلاً!", ephemeral=True)
+            return
         try:
-            await interaction.user.send(
-                f"📌 **Board:** {self.board}\n"
-                f"🌐 **IP:** `{self.ip}`\n"
-                f"🔌 **Port:** `{self.port}`\n\n"
-                f"انسخ الـ IP والبورت والصقهم في Minecraft!"
-            )
+            await interaction.user.send(text)
             await interaction.response.send_message("📩 تم إرسال معلومات السيرفر!", ephemeral=True)
         except discord.Forbidden:
             await interaction.response.send_message(
@@ -421,11 +1271,512 @@ class JoinButton(discord.ui.View):
                 ephemeral=True
             )
 
+_join_view = None
+
+def get_join_view() -> JoinButton:
+    """الـ View يُنشأ مرة واحدة داخل الـ event loop ويُستخدم مع كل رسالة جديدة"""
+    global _join_view
+    if _join_view is None:
+        _join_view = JoinButton()
+    return _join_view
+
+# -------------------------------------------------------------------
+# 🔒 توزيع العمل على عدة نسخ (Leases)
+class LeaseManager:
+    """
+    جدول Leases مشترك في SQLite:
+    - كل قناة تنتمي لـ partition حسب hash رقمها
+    - كل نسخة تحجز نصيبها العادل من الـ partitions وتجددها كل دورة
+    - إذا توقفت نسخة تنتهي Leases الخاصة بها وتأخذها البقية
+    كل رسائل القناة (منفصلة أو مجمعة) لها كاتب واحد فقط.
+    """
+
+    def __init__(self, path: str, instance_id: str, partitions: int = 16, ttl: int = 150):
+        self.instance_id = instance_id
+        self.partitions = partitions
+        self.ttl = ttl
+        self.owned = {}  # partition -> وقت الانتهاء
+        self.lock = Lock()  # refresh يعمل في thread والأوامر في الـ event loop
+        self.conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            "partition INTEGER PRIMARY KEY, owner TEXT, expires REAL NOT NULL DEFAULT 0)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS instances (id TEXT PRIMARY KEY, seen REAL NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS messages (key TEXT PRIMARY KEY, ids TEXT NOT NULL)")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO leases (partition) VALUES (?)",
+            [(p,) for p in range(partitions)]
+        )
+
+    def partition_of(self, channel_id) -> int:
+        return zlib.crc32(str(channel_id).encode()) % self.partitions
+
+    def owns(self, channel_id) -> bool:
+        expires = self.owned.get(self.partition_of(channel_id))
+        return expires is not None and expires > time.time()
+
+    def needs_renewal(self) -> bool:
+        return not self.owned or min(self.owned.values()) - time.time() < self.ttl / 2
+
+    def refresh(self) -> set:
+        """تجديد الـ Leases وحجز/تحرير الـ partitions، يرجع الجديدة منها"""
+        with self.lock:
+            return self._refresh()
+
+    def _refresh(self) -> set:
+        now = time.time()
+        expires = now + self.ttl
+        db = self.conn
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("INSERT OR REPLACE INTO instances (id, seen) VALUES (?, ?)", (self.instance_id, now))
+            db.execute("DELETE FROM instances WHERE seen < ?", (now - self.ttl,))
+            live = db.execute("SELECT COUNT(*) FROM instances").fetchone()[0]
+            share = math.ceil(self.partitions / max(live, 1))
+
+            db.execute("UPDATE leases SET expires = ? WHERE owner = ? AND expires >= ?",
+                       (expires, self.instance_id, now))
+            owned = [row[0] for row in db.execute(
+                "SELECT partition FROM leases WHERE owner = ? AND expires >= ? ORDER BY partition",
+                (self.instance_id, now)
+            )]
+
+            if len(owned) > share:
+                # نسخة جديدة انضمت: نترك الزائد ليحجزه غيرنا
+                for p in owned[share:]:
+                    db.execute("UPDATE leases SET owner = NULL, expires = 0 WHERE partition = ?", (p,))
+                owned = owned[:share]
+            elif len(owned) < share:
+                free = [row[0] for row in db.execute(
+                    "SELECT partition FROM leases WHERE owner IS NULL OR expires < ? "
+                    "ORDER BY partition LIMIT ?", (now, share - len(owned))
+                )]
+                for p in free:
+                    db.execute("UPDATE leases SET owner = ?, expires = ? WHERE partition = ?",
+                               (self.instance_id, expires, p))
+                owned += free
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+        acquired = set(owned) - set(self.owned)
+        released = set(self.owned) - set(owned)
+        self.owned = {p: expires for p in owned}
+        if acquired or released:
+            log(f"🔒 Leases: {len(owned)}/{self.partitions} (+{len(acquired)} -{len(released)}) | نسخ: {live}", Colors.BLUE)
+        return acquired
+
+    def release(self):
+        """تحرير كل الـ Leases عند الإغلاق حتى تأخذها البقية فوراً"""
+        try:
+            with self.lock:
+                self.conn.execute("UPDATE leases SET owner = NULL, expires = 0 WHERE owner = ?", (self.instance_id,))
+                self.conn.execute("DELETE FROM instances WHERE id = ?", (self.instance_id,))
+        except sqlite3.Error:
+            pass
+        self.owned = {}
+
+    # أرقام الرسائل مشتركة حتى لا تنشئ النسخة الجديدة رسائل مكررة بعد الاستلام
+    def get_messages(self, key: str) -> Optional[list]:
+        with self.lock:
+            row = self.conn.execute("SELECT ids FROM messages WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_messages(self, key: str, ids: list):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO messages (key, ids) VALUES (?, ?)", (key, json.dumps(ids)))
+
+# الحقول التي يكتبها مالك القناة فقط، لا تدخل في صفوف الإعدادات المشتركة
+TARGET_RUNTIME_KEYS = ("last_status", "message_id")
+
+class SharedState:
+    """
+    الإعدادات المشتركة بين النسخ في نفس ملف الـ Leases:
+    - صف لكل مستخدم / قناة / سيرفر (إحصائيات) / Guild مع رقم rev يزيد مع كل كتابة
+    - الحفظ يكتب فقط الصفوف التي تغيرت في هذه النسخة، فلا تمسح ما سجلته نسخة أخرى
+    - السحب يأخذ الصفوف الأحدث من آخر rev رأيناه
+    """
+
+    def __init__(self, leases: LeaseManager):
+        self.leases = leases
+        self.seen = {}  # (kind, key) -> آخر JSON نعرفه (None = محذوف)
+        self.rev = 0
+        leases.conn.execute(
+            "CREATE TABLE IF NOT EXISTS shared ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, rev INTEGER NOT NULL, data TEXT, "
+            "PRIMARY KEY (kind, key))"
+        )
+
+    @staticmethod
+    def encode(kind: str, value: Any) -> str:
+        if kind == "user":
+            value = dict(value, servers={
+                server_id: {k: v for k, v in info.items() if k not in TARGET_RUNTIME_KEYS}
+                for server_id, info in value.get("servers", {}).items()
+            })
+        elif kind == "channel":
+            value = {k: v for k, v in value.items() if k != "message_ids"}
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+    @staticmethod
+    def apply(kind: str, local: dict, key: str, value: Any):
+        """استبدال الصف المحلي مع إبقاء حقول التشغيل (ونفس الـ dict للسيرفرات الموجودة)"""
+        old = local.get(key)
+        if kind == "user" and old:
+            old_servers = old.get("servers", {})
+            for server_id, info in value.get("servers", {}).items():
+                prev = old_servers.get(server_id)
+                if prev is not None:
+                    runtime = {k: prev[k] for k in TARGET_RUNTIME_KEYS if k in prev}
+                    prev.clear()
+                    prev.update(info)
+                    prev.update(runtime)
+                    value["servers"][server_id] = prev
+        elif kind == "channel" and old and old.get("message_ids"):
+            value["message_ids"] = old["message_ids"]
+        local[key] = value
+
+    def push(self, kind: str, local: dict, partial: bool = False):
+        """partial = صفوف محددة فقط، بدون حذف ما ليس في local (يُستدعى من الـ HTTP thread أيضاً)"""
+        with self.leases.lock:
+            changes = [(key, data) for key, data in
+                       ((key, self.encode(kind, value)) for key, value in list(local.items()))
+                       if self.seen.get((kind, key)) != data]
+            if not partial:
+                changes += [(key, None) for (k, key), data in self.seen.items()
+                            if k == kind and data is not None and key not in local]
+            if not changes:
+                return
+            db = self.leases.conn
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                rev = db.execute("SELECT COALESCE(MAX(rev), 0) + 1 FROM shared").fetchone()[0]
+                db.executemany("INSERT OR REPLACE INTO shared (kind, key, rev, data) VALUES (?, ?, ?, ?)",
+                               [(kind, key, rev, data) for key, data in changes])
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            for key, data in changes:
+                self.seen[(kind, key)] = data
+
+    def pull(self, stores: Dict[str, dict]) -> set:
+        """يطبق ما كتبته النسخ الأخرى، يرجع أنواع الصفوف التي تغيرت"""
+        changed = set()
+        with self.leases.lock:
+            rows = self.leases.conn.execute(
+                "SELECT kind, key, rev, data FROM shared WHERE rev > ? ORDER BY rev", (self.rev,)
+            ).fetchall()
+            for kind, key, rev, data in rows:
+                self.rev = max(self.rev, rev)
+                if self.seen.get((kind, key)) == data:
+                    continue
+                self.seen[(kind, key)] = data
+                if kind not in stores:
+                    continue
+                if data is None:
+                    stores[kind].pop(key, None)
+                else:
+                    self.apply(kind, stores[kind], key, json.loads(data))
+                changed.add(kind)
+        return changed
+
+    def load(self, stores: Dict[str, dict]) -> bool:
+        """عند التشغيل: الجدول هو المرجع، وإذا كان فارغاً يُملأ من الملفات المحلية"""
+        with self.leases.lock:
+            alive = {(kind, key) for kind, key in self.leases.conn.execute(
+                "SELECT kind, key FROM shared WHERE data IS NOT NULL")}
+        if not any(kind in stores for kind, _ in alive):
+            for kind, local in stores.items():
+                self.push(kind, local)
+            return False
+        for kind, local in stores.items():
+            for key in [key for key in local if (kind, key) not in alive]:
+                del local[key]
+        self.pull(stores)
+        return True
+
+    def get(self, kind: str, key: str) -> Any:
+        with self.leases.lock:
+            row = self.leases.conn.execute(
+                "SELECT data FROM shared WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def put(self, kind: str, key: str, value: Any):
+        self.push(kind, {key: value}, partial=True)
+
+lease_manager = LeaseManager(LEASE_DB, INSTANCE_ID, LEASE_PARTITIONS, LEASE_TTL) if LEASE_DB else None
+shared_state = SharedState(lease_manager) if lease_manager else None
+if lease_manager:
+    atexit.register(lease_manager.release)
+
+def shared_stores() -> Dict[str, dict]:
+    return {"user": servers_data, "stats": stats_data, "channel": channels_data, "guild": guilds_data,
+            "heartbeat": heartbeats}
+
+def share_rows(kind: str, data: dict):
+    """كتابة الصفوف التي تغيرت محلياً في الجدول المشترك (لا شيء بدون LEASE_DB)"""
+    if shared_state is None:
+        return
+    try:
+        shared_state.push(kind, data)
+    except sqlite3.Error as e:
+        log(f"❌ خطأ في حفظ الإعدادات المشتركة: {e}", Colors.RED)
+
+def sync_shared_state():
+    """سحب تغييرات النسخ الأخرى (سيرفرات جديدة، حذف، إعدادات)"""
+    try:
+        changed = shared_state.pull(shared_stores())
+    except sqlite3.Error as e:
+        log(f"❌ خطأ في قراءة الإعدادات المشتركة: {e}", Colors.RED)
+        return
+    if "user" in changed:
+        rebuild_heartbeat_tokens()
+        rebuild_message_index()
+        embed_templates.clear()
+    if changed - {"heartbeat"}:
+        log(f"🔄 تم سحب تغييرات من نسخ أخرى: {', '.join(sorted(changed))}", Colors.BLUE)
+
+if shared_state:
+    if shared_state.load(shared_stores()):
+        log(f"🔄 تم تحميل الإعدادات من {LEASE_DB}", Colors.BLUE)
+        rebuild_heartbeat_tokens()
+        rebuild_message_index()
+    else:
+        log(f"📤 تم نسخ الإعدادات المحلية إلى {LEASE_DB}", Colors.BLUE)
+
+def owns_channel(channel_id) -> bool:
+    return lease_manager is None or lease_manager.owns(channel_id)
+
+def record_messages(key: str, ids: list):
+    """مشاركة أرقام الرسائل مع باقي النسخ (لا شيء بدون LEASE_DB)"""
+    if lease_manager:
+        lease_manager.set_messages(key, ids)
+
+def record_heartbeat(server_id: str):
+    """الـ POST قد يصل لنسخة لا تملك القناة: المالكة تقرأه مع سحب الإعدادات"""
+    if shared_state:
+        try:
+            shared_state.put("heartbeat", server_id, list(heartbeats[server_id]))
+        except sqlite3.Error as e:
+            log(f"❌ خطأ في حفظ Heartbeat لـ {server_id}: {e}", Colors.RED)
+
+def record_last_status(server_id: str, status: str):
+    """آخر حالة يكتبها المالك، حتى لا تكرر النسخة المستلمة نفس التغيير والتنبيه"""
+    if shared_state:
+        try:
+            shared_state.put("status", server_id, status)
+        except sqlite3.Error as e:
+            log(f"❌ خطأ في حفظ حالة {server_id}: {e}", Colors.RED)
+
+def load_acquired_messages(acquired: set):
+    """عند استلام partitions جديدة: نأخذ أرقام رسائلها وآخر حالة من الجدول المشترك"""
+    for user_id, server_id, info in iter_servers():
+        channel_id = info.get("channel_id")
+        if channel_id and lease_manager.partition_of(channel_id) in acquired:
+            ids = lease_manager.get_messages(f"server:{server_id}")
+            if ids:
+                info["message_id"] = ids[0]
+                index_message(ids[0], ("server", user_id, server_id))
+            # حالتنا المحلية قديمة، و unknown لا يسجل تغييراً ولا يرسل تنبيهاً
+            info["last_status"] = shared_state.get("status", server_id) or "unknown"
+    for channel_key, board_cfg in channels_data.items():
+        if lease_manager.partition_of(channel_key) in acquired:
+            ids = lease_manager.get_messages(f"board:{channel_key}")
+            if ids:
+                board_cfg["message_ids"] = ids
+                for page, message_id in enumerate(ids, 1):
+                    index_message(message_id, ("board", channel_key, page))
+
+async def refresh_leases():
+    try:
+        acquired = await asyncio.to_thread(lease_manager.refresh)
+    except sqlite3.Error as e:
+        log(f"❌ خطأ في جدول الـ Leases: {e}", Colors.RED)
+        return
+    sync_shared_state()
+    if acquired:
+        try:
+            load_acquired_messages(acquired)
+        except sqlite3.Error as e:
+            log(f"❌ خطأ في جدول الـ Leases: {e}", Colors.RED)
+
+# -------------------------------------------------------------------
+# ⚖️ الجدولة العادلة بين السيرفرات (Weighted Fair Queuing)
+class FairScheduler:
+    """
+    - ترتيب الدورة يتناوب بين الـ Guilds حسب الوزن بدل ترتيب التسجيل
+    - داخل كل Guild: ما أُجّل بسبب الحصة يأتي أولاً في الدورة التالية، والباقي يدور
+    - حصص فحوصات وتعديلات لكل Guild في كل نافذة زمنية
+    """
+
+    def __init__(self, window: int = 60, probe_limit: int = 0, edit_limit: int = 0):
+        self.window = window
+        self.probe_limit = probe_limit
+        self.edit_limit = edit_limit
+        self.window_start = time.time()
+        self.usage = {}       # guild -> {"probe", "edit", "deferred"} للنافذة الحالية
+        self.last_usage = {}  # النافذة السابقة الكاملة
+        self.cursors = {}     # guild -> إزاحة التدوير
+        self.deferred = {}    # guild -> مفاتيح الأهداف المؤجلة بالترتيب
+
+    def _roll(self):
+        if time.time() - self.window_start >= self.window:
+            self.last_usage = self.usage
+            self.usage = {}
+            self.window_start = time.time()
+
+    def weight(self, guild_id) -> float:
+        try:
+            return max(float(guilds_data.get(str(guild_id), {}).get("weight", 1)), 0.1)
+        except (TypeError, ValueError):
+            return 1.0
+
+    def limit(self, guild_id, kind: str) -> int:
+        default = self.probe_limit if kind == "probe" else self.edit_limit
+        return int(guilds_data.get(str(guild_id), {}).get(f"{kind}_limit", default))
+
+    def order(self, targets, guild_of, key_of) -> list:
+        """ترتيب الأهداف بالتناوب الموزون بين الـ Guilds"""
+        self._roll()
+        queues = {}
+        for target in targets:
+            queues.setdefault(guild_of(target), []).append(target)
+
+        heap = []
+        for n, (guild_id, queue) in enumerate(queues.items()):
+            shift = self.cursors.get(guild_id, 0) % len(queue)
+            queue = queue[shift:] + queue[:shift]
+            self.cursors[guild_id] = shift + 1
+            # المؤجلون أولاً حتى لا يتكرر تأجيل نفس الأهداف كل نافذة
+            rank = {key: i for i, key in enumerate(self.deferred.pop(guild_id, []))}
+            if rank:
+                queue.sort(key=lambda target: rank.get(key_of(target), len(rank)))
+            queues[guild_id] = queue
+            heapq.heappush(heap, (1 / self.weight(guild_id), n, guild_id, 0))
+
+        ordered = []
+        while heap:
+            finish, n, guild_id, served = heapq.heappop(heap)
+            queue = queues[guild_id]
+            ordered.append(queue[served])
+            if served + 1 < len(queue):
+                heapq.heappush(heap, (finish + 1 / self.weight(guild_id), n, guild_id, served + 1))
+        return ordered
+
+    def take(self, guild_id, kind: str, key=None) -> bool:
+        """استهلاك فحص/تعديل من حصة الـ Guild، False إذا انتهت الحصة (والهدف key يتقدم الدورة القادمة)"""
+        self._roll()
+        usage = self.usage.setdefault(guild_id, {"probe": 0, "edit": 0, "deferred": 0})
+        limit = self.limit(guild_id, kind)
+        if limit and usage[kind] >= limit:
+            usage["deferred"] += 1
+            if key is not None:
+                deferred = self.deferred.setdefault(guild_id, [])
+                if key not in deferred:
+                    deferred.append(key)
+            return False
+        usage[kind] += 1
+        return True
+
+    def shares(self) -> list:
+        """نصيب كل Guild من الاستخدام (آخر نافذة كاملة)، الأكبر أولاً"""
+        usage = self.last_usage or self.usage
+        total = sum(u["probe"] + u["edit"] for u in usage.values()) or 1
+        rows = [
+            (guild_id, u["probe"], u["edit"], u["deferred"], (u["probe"] + u["edit"]) * 100 / total)
+            for guild_id, u in usage.items()
+        ]
+        return sorted(rows, key=lambda row: row[4], reverse=True)
+
+scheduler = FairScheduler(GUILD_QUOTA_WINDOW, GUILD_PROBE_LIMIT, GUILD_EDIT_LIMIT)
+
+def guild_of_target(target) -> Any:
+    return target[2].get("guild_id") or "unknown"
+
+def key_of_target(target) -> str:
+    return target[1]
+
+async def is_bot_admin(user) -> bool:
+    return user.id in ADMIN_IDS or await bot.is_owner(user)
+
+# -------------------------------------------------------------------
+# 🔔 تنبيهات تغيّر الحالة (مجمعة لكل قناة)
+# channel_id -> {server_id: {"board", "from", "to", "role_id"}}
+notification_queue = {}
+notification_sent = {}  # channel_id -> deque(أوقات الإرسال خلال آخر ساعة)
+
+STATUS_NAMES = {
+    "online": "🟢 أونلاين",
+    "offline": "🔴 أوفلاين",
+    "standby": "🟠 في وضع الاستعداد",
+    "maintenance": "🚧 تحت الصيانة"
+}
+
+def queue_notification(server_id: str, info: Dict[str, Any], old_status: str, new_status: str):
+    """إضافة تغيير حالة لطابور القناة (فقط إذا فعّل صاحب السيرفر التنبيهات)"""
+    channel_id = info.get("notify_channel_id")
+    if not channel_id:
+        return
+    pending = notification_queue.setdefault(channel_id, {})
+    if server_id in pending:
+        # دمج: نحتفظ بالحالة الأولى ونحدّث الأخيرة
+        pending[server_id]["to"] = new_status
+    else:
+        pending[server_id] = {
+            "board": info.get("board", "Vanilla Survival"),
+            "from": old_status,
+            "to": new_status,
+            "role_id": info.get("notify_role_id")
+        }
+
+def build_notification(events: list) -> str:
+    """رسالة واحدة لكل التغييرات: سطر لكل حالة جديدة"""
+    by_status = {}
+    for event in events:
+        by_status.setdefault(event["to"], []).append(clip(event["board"], NOTIFY_NAME_LIMIT))
+
+    lines = []
+    for status, boards in by_status.items():
+        name = STATUS_NAMES.get(status, status)
+        if len(boards) == 1:
+            lines.append(f"{name} — **{boards[0]}**")
+        else:
+            shown = "، ".join(boards[:10])
+            more = f" +{len(boards) - 10}" if len(boards) > 10 else ""
+            lines.append(f"{name} — **{len(boards)} سيرفرات**: {shown}{more}")
+
+    roles = {event["role_id"] for event in events if event.get("role_id")}
+    mentions = " ".join(f"<@&{role_id}>" for role_id in roles)
+    return clip((mentions + "\n" if mentions else "") + "\n".join(lines), NOTIFY_MAX_CHARS)
+
+def requeue_notifications(channel_id, pending: dict):
+    """إرجاع تغييرات فشل إرسالها للطابور، مع دمجها بما وصل أثناء المحاولة"""
+    queue = notification_queue.setdefault(channel_id, {})
+    for server_id, event in pending.items():
+        if server_id in queue:
+            queue[server_id]["from"] = event["from"]
+        else:
+            queue[server_id] = event
+
+def can_notify(channel_id) -> bool:
+    """حد الرسائل لكل قناة خلال ساعة"""
+    sent = notification_sent.setdefault(channel_id, deque())
+    while sent and time.time() - sent[0] > 3600:
+        sent.popleft()
+    return len(sent) < NOTIFY_MAX_PER_HOUR
+
 # -------------------------------------------------------------------
 # الأوامر
 @bot.tree.command(name="تحديد", description="تحديد السيرفر")
-@app_commands.describe(address="IP:Port مثل: play.server.com:25565")
-async def تحديد(interaction: discord.Interaction, address: str):
+@app_commands.describe(
+    address="IP:Port مثل: play.server.com:25565",
+    name="اسم السيرفر (اختياري) - اسم جديد يضيف سيرفر آخر"
+)
+async def تحديد(interaction: discord.Interaction, address: str, name: Optional[str] = None):
     if ":" not in address:
         await interaction.response.send_message(
             "❌ يرجى إدخال IP والبورت بهذا الشكل: `play.server.com:25565`", 
@@ -439,22 +1790,76 @@ async def تحديد(interaction: discord.Interaction, address: str):
         return
 
     user_id = str(interaction.user.id)
-    servers_data[user_id] = servers_data.get(user_id, {})
-    servers_data[user_id].update({
+    entry = servers_data.setdefault(user_id, {"selected": None, "servers": {}})
+
+    if name:
+        server_id = find_server_by_name(user_id, name)
+    else:
+        server_id = entry.get("selected") if entry.get("selected") in entry["servers"] else None
+
+    if server_id is None:
+        if len(entry["servers"]) >= MAX_SERVERS_PER_USER:
+            await interaction.response.send_message(
+                f"❌ الحد الأقصى {MAX_SERVERS_PER_USER} سيرفرات لكل مستخدم!",
+                ephemeral=True
+            )
+            return
+        server_id = new_server_id(user_id)
+
+    server = entry["servers"].get(server_id, {})
+    server.update({
+        "name": name or server.get("name", "main"),
         "ip": ip,
         "port": port,
-        "version": servers_data[user_id].get("version", "غير محددة"),
-        "board": servers_data[user_id].get("board", "Vanilla Survival"),
-        "channel_id": servers_data[user_id].get("channel_id"),
-        "message_id": servers_data[user_id].get("message_id"),
-        "image_url": servers_data[user_id].get("image_url"),
-        "image_pos": servers_data[user_id].get("image_pos"),
-        "style": servers_data[user_id].get("style", "classic"),
+        "version": server.get("version", "غير محددة"),
+        "board": server.get("board", "Vanilla Survival"),
+        "channel_id": server.get("channel_id"),
+        "message_id": server.get("message_id"),
+        "image_url": server.get("image_url"),
+        "image_pos": server.get("image_pos"),
+        "style": server.get("style", "classic"),
         "maintenance": False,
         "last_status": "unknown"
     })
+    entry["servers"][server_id] = server
+    entry["selected"] = server_id
     save_data(servers_data)
-    await interaction.response.send_message(f"✅ تم حفظ السيرفر: `{ip}:{port}`", ephemeral=True)
+    await interaction.response.send_message(
+        f"✅ تم حفظ السيرفر **{server['name']}**: `{ip}:{port}`",
+        ephemeral=True
+    )
+
+# -------------------------------------------------------------------
+@bot.tree.command(name="اختيار_سيرفر", description="اختيار السيرفر الذي تطبق عليه الأوامر")
+@app_commands.describe(name="اسم السيرفر")
+async def اختيار_سيرفر(interaction: discord.Interaction, name: str):
+    user_id = str(interaction.user.id)
+    server_id = find_server_by_name(user_id, name)
+    if server_id is None:
+        await interaction.response.send_message("❌ لا يوجد سيرفر بهذا الاسم! استخدم `/سيرفراتي`", ephemeral=True)
+        return
+
+    servers_data[user_id]["selected"] = server_id
+    save_data(servers_data)
+    await interaction.response.send_message(f"✅ السيرفر المختار: **{name}**", ephemeral=True)
+
+# -------------------------------------------------------------------
+@bot.tree.command(name="سيرفراتي", description="عرض جميع سيرفراتك")
+async def سيرفراتي(interaction: discord.Interaction):
+    user_id = str(interaction.user.id)
+    entry = servers_data.get(user_id)
+    if not entry or not entry.get("servers"):
+        await interaction.response.send_message("❌ لا توجد بيانات!", ephemeral=True)
+        return
+
+    lines = []
+    for server_id, info in entry["servers"].items():
+        marker = "👉 " if server_id == entry.get("selected") else ""
+        lines.append(f"{marker}**{info.get('name', 'main')}** — `{info.get('ip')}:{info.get('port')}` ({info.get('board', 'Vanilla Survival')})")
+
+    embed = discord.Embed(title="🗂️ سيرفراتك", description="\n".join(lines), color=0x3498db)
+    embed.set_footer(text=f"{len(entry['servers'])}/{MAX_SERVERS_PER_USER} سيرفر")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
 
 # -------------------------------------------------------------------
 @bot.tree.command(name="صيانة", description="تفعيل/تعطيل وضع الصيانة")
@@ -465,7 +1870,8 @@ async def تحديد(interaction: discord.Interaction, address: str):
 ])
 async def صيانة(interaction: discord.Interaction, enabled: app_commands.Choice[str]):
     user_id = str(interaction.user.id)
-    if user_id not in servers_data or "ip" not in servers_data[user_id]:
+    info = get_selected_server(user_id)
+    if info is None:
         await interaction.response.send_message(
             "❌ لم يتم تحديد سيرفر! استخدم `/تحديد` أولاً.", 
             ephemeral=True
@@ -473,22 +1879,23 @@ async def صيانة(interaction: discord.Interaction, enabled: app_commands.Cho
         return
     
     is_enabled = enabled.value == "true"
-    servers_data[user_id]["maintenance"] = is_enabled
+    info["maintenance"] = is_enabled
     
     # تحديث الإحصائيات
-    if user_id not in stats_data:
-        stats_data[user_id] = {"maintenance_count": 0, "last_maintenance_start": None}
+    server_id = servers_data[user_id]["selected"]
+    if server_id not in stats_data:
+        stats_data[server_id] = {"maintenance_count": 0, "last_maintenance_start": None}
     
     if is_enabled:
-        stats_data[user_id]["maintenance_count"] = stats_data[user_id].get("maintenance_count", 0) + 1
-        stats_data[user_id]["last_maintenance_start"] = datetime.now().isoformat()
-        log_status_change(user_id, servers_data[user_id].get("last_status", "unknown"), "maintenance")
+        stats_data[server_id]["maintenance_count"] = stats_data[server_id].get("maintenance_count", 0) + 1
+        stats_data[server_id]["last_maintenance_start"] = datetime.now().isoformat()
+        log_status_change(server_id, info.get("last_status", "unknown"), "maintenance")
     else:
         # حساب مدة الصيانة
-        if stats_data[user_id].get("last_maintenance_start"):
-            start = datetime.fromisoformat(stats_data[user_id]["last_maintenance_start"])
+        if stats_data[server_id].get("last_maintenance_start"):
+            start = datetime.fromisoformat(stats_data[server_id]["last_maintenance_start"])
             duration = (datetime.now() - start).total_seconds()
-            stats_data[user_id]["total_maintenance_time"] = stats_data[user_id].get("total_maintenance_time", 0) + duration
+            stats_data[server_id]["total_maintenance_time"] = stats_data[server_id].get("total_maintenance_time", 0) + duration
     
     save_data(servers_data)
     save_stats(stats_data)
@@ -505,11 +1912,12 @@ async def صيانة(interaction: discord.Interaction, enabled: app_commands.Cho
 ])
 async def مدعوم(interaction: discord.Interaction, version: app_commands.Choice[str]):
     user_id = str(interaction.user.id)
-    if user_id not in servers_data or "ip" not in servers_data[user_id]:
+    info = get_selected_server(user_id)
+    if info is None:
         await interaction.response.send_message("❌ لم يتم تحديد سيرفر!", ephemeral=True)
         return
 
-    servers_data[user_id]["version"] = version.value
+    info["version"] = version.value
     save_data(servers_data)
     await interaction.response.send_message(f"✅ النسخة: **{version.value}**", ephemeral=True)
 
@@ -518,11 +1926,12 @@ async def مدعوم(interaction: discord.Interaction, version: app_commands.Cho
 @app_commands.describe(name="اسم الـ Board الجديد")
 async def تعيين_اسم(interaction: discord.Interaction, name: str):
     user_id = str(interaction.user.id)
-    if user_id not in servers_data or "ip" not in servers_data[user_id]:
+    info = get_selected_server(user_id)
+    if info is None:
         await interaction.response.send_message("❌ لم يتم تحديد سيرفر!", ephemeral=True)
         return
 
-    servers_data[user_id]["board"] = name
+    info["board"] = name
     save_data(servers_data)
     await interaction.response.send_message(f"✅ اسم الـ Board: **{name}**", ephemeral=True)
 
@@ -536,7 +1945,8 @@ async def تعيين_اسم(interaction: discord.Interaction, name: str):
 ])
 async def تعيين_صورة(interaction: discord.Interaction, url: str, position: app_commands.Choice[str]):
     user_id = str(interaction.user.id)
-    if user_id not in servers_data or "ip" not in servers_data[user_id]:
+    info = get_selected_server(user_id)
+    if info is None:
         await interaction.response.send_message("❌ لم يتم تحديد سيرفر!", ephemeral=True)
         return
 
@@ -544,8 +1954,8 @@ async def تعيين_صورة(interaction: discord.Interaction, url: str, positi
         await interaction.response.send_message("❌ الرابط يجب أن يبدأ بـ `https://`", ephemeral=True)
         return
 
-    servers_data[user_id]["image_url"] = url
-    servers_data[user_id]["image_pos"] = position.value
+    info["image_url"] = url
+    info["image_pos"] = position.value
     save_data(servers_data)
     await interaction.response.send_message(f"✅ تم تعيين الصورة! الموقع: **{position.value}**", ephemeral=True)
 
@@ -553,23 +1963,18 @@ async def تعيين_صورة(interaction: discord.Interaction, url: str, positi
 @bot.tree.command(name="حذف_صورة", description="حذف الصورة")
 async def حذف_صورة(interaction: discord.Interaction):
     user_id = str(interaction.user.id)
-    if user_id not in servers_data:
+    info = get_selected_server(user_id)
+    if info is None:
         await interaction.response.send_message("❌ لا توجد بيانات!", ephemeral=True)
         return
 
-    servers_data[user_id]["image_url"] = None
-    servers_data[user_id]["image_pos"] = None
+    info["image_url"] = None
+    info["image_pos"] = None
     save_data(servers_data)
     await interaction.response.send_message("✅ تم حذف الصورة!", ephemeral=True)
 
 # -------------------------------------------------------------------
-@bot.tree.command(name="تخصيص_الرسالة", description="تخصيص شكل الرسالة المثبتة")
-@app_commands.describe(
-    style="اختر الاستايل",
-    custom_title="عنوان مخصص (اختياري)",
-    custom_description="وصف مخصص (اختياري)"
-)
-@app_commands.choices(style=[
+STYLE_CHOICES = [
     app_commands.Choice(name="🎮 Classic", value="classic"),
     app_commands.Choice(name="✨ Modern", value="modern"),
     app_commands.Choice(name="🌙 Dark", value="dark"),
@@ -577,19 +1982,42 @@ async def حذف_صورة(interaction: discord.Interaction):
     app_commands.Choice(name="🎯 Pixel", value="pixel"),
     app_commands.Choice(name="🌅 Sunset", value="sunset"),
     app_commands.Choice(name="🌌 Aurora", value="aurora")
-])
+]
+
+@bot.tree.command(name="تخصيص_الرسالة", description="تخصيص شكل الرسالة المثبتة")
+@app_commands.describe(
+    style="اختر الاستايل",
+    custom_title="عنوان مخصص (اختياري) - {status} للحالة",
+    custom_description="وصف مخصص (اختياري) - {ip} {port} {version} {players} {max_players} {latency}"
+)
+@app_commands.choices(style=STYLE_CHOICES)
 async def تخصيص_الرسالة(interaction: discord.Interaction, style: app_commands.Choice[str],
                          custom_title: Optional[str] = None, custom_description: Optional[str] = None):
     user_id = str(interaction.user.id)
-    if user_id not in servers_data or "ip" not in servers_data[user_id]:
+    info = get_selected_server(user_id)
+    if info is None:
         await interaction.response.send_message("❌ لم يتم تحديد سيرفر!", ephemeral=True)
         return
 
-    servers_data[user_id]["style"] = style.value
+    # التحقق من الـ placeholders مرة واحدة هنا بدل كل تحديث
+    bad_title = invalid_placeholders(custom_title, TITLE_PLACEHOLDERS)
+    bad_desc = invalid_placeholders(custom_description, DESC_PLACEHOLDERS)
+    if bad_title or bad_desc:
+        bad = ", ".join(f"`{{{name}}}`" for name in bad_title + bad_desc)
+        await interaction.response.send_message(
+            f"❌ متغيرات غير معروفة: {bad}\n"
+            f"**العنوان:** {', '.join(f'`{{{n}}}`' for n in TITLE_PLACEHOLDERS)}\n"
+            f"**الوصف:** {', '.join(f'`{{{n}}}`' for n in DESC_PLACEHOLDERS)}",
+            ephemeral=True
+        )
+        return
+
+    info["style"] = style.value
     if custom_title:
-        servers_data[user_id]["custom_title"] = custom_title
+        info["custom_title"] = custom_title
     if custom_description:
-        servers_data[user_id]["custom_desc"] = custom_description
+        info["custom_desc"] = custom_description
+    embed_templates.clear()
     
     save_data(servers_data)
     await interaction.response.send_message(
@@ -598,19 +2026,59 @@ async def تخصيص_الرسالة(interaction: discord.Interaction, style: app
         ephemeral=True
     )
 
+# -------------------------------------------------------------------
+@bot.tree.command(name="سجل_اللاعبين", description="عرض رسم عدد اللاعبين لآخر 24 ساعة في الرسالة")
+@app_commands.choices(enabled=[
+    app_commands.Choice(name="تفعيل", value="true"),
+    app_commands.Choice(name="تعطيل", value="false")
+])
+async def سجل_اللاعبين(interaction: discord.Interaction, enabled: app_commands.Choice[str]):
+    user_id = str(interaction.user.id)
+    info = get_selected_server(user_id)
+    if info is None:
+        await interaction.response.send_message("❌ لم يتم تحديد سيرفر!", ephemeral=True)
+        return
+
+    info["show_history"] = enabled.value == "true"
+    save_data(servers_data)
+    status = "مفعّل 📈" if info["show_history"] else "معطّل"
+    await interaction.response.send_message(f"✅ سجل اللاعبين الآن {status}", ephemeral=True)
+
+# -------------------------------------------------------------------
+@bot.tree.command(name="كلمات_الاستعداد", description="كلمات إضافية في الـ MOTD تعني أن السيرفر في وضع الاستعداد")
+@app_commands.describe(keywords="كلمات مفصولة بفاصلة مثل: whitelist, restarting (فارغ = الافتراضي فقط)")
+async def كلمات_الاستعداد(interaction: discord.Interaction, keywords: Optional[str] = None):
+    user_id = str(interaction.user.id)
+    info = get_selected_server(user_id)
+    if info is None:
+        await interaction.response.send_message("❌ لم يتم تحديد سيرفر!", ephemeral=True)
+        return
+
+    words = parse_keywords(keywords or "")
+    info["standby_keywords"] = list(words)
+    save_data(servers_data)
+
+    defaults = ", ".join(DEFAULT_STANDBY_KEYWORDS)
+    custom = ", ".join(words) if words else "لا يوجد"
+    await interaction.response.send_message(
+        f"✅ كلمات الاستعداد:\n**الافتراضية:** {defaults}\n**المخصصة:** {custom}",
+        ephemeral=True
+    )
+
 # -------------------------------------------------------------------
 @bot.tree.command(name="معلوماتي", description="عرض معلوماتك")
 async def معلوماتي(interaction: discord.Interaction):
     user_id = str(interaction.user.id)
-    if user_id not in servers_data or "ip" not in servers_data[user_id]:
+    info = get_selected_server(user_id)
+    if info is None:
         await interaction.response.send_message("❌ لا توجد بيانات!", ephemeral=True)
         return
 
-    info = servers_data[user_id]
-    stats = stats_data.get(user_id, {})
+    stats = stats_data.get(servers_data[user_id]["selected"], {})
     channel = bot.get_channel(info.get("channel_id")) if info.get("channel_id") else None
     
     embed = discord.Embed(title="📊 معلوماتك", color=0x3498db)
+    embed.add_field(name="🏷️ السيرفر", value=info.get('name', 'main'), inline=True)
     embed.add_field(name="🌐 IP", value=f"`{info.get('ip')}`", inline=True)
     embed.add_field(name="🔌 Port", value=f"`{info.get('port')}`", inline=True)
     embed.add_field(name="📦 Version", value=info.get('version', 'غير محددة'), inline=True)
@@ -632,57 +2100,176 @@ async def معلوماتي(interaction: discord.Interaction):
 
 # -------------------------------------------------------------------
 @bot.tree.command(name="حذف_السيرفر", description="حذف جميع البيانات")
-async def حذف_السيرفر(interaction: discord.Interaction):
+@app_commands.describe(name="اسم السيرفر (اختياري) - بدونه يتم حذف كل سيرفراتك")
+async def حذف_السيرفر(interaction: discord.Interaction, name: Optional[str] = None):
     user_id = str(interaction.user.id)
     if user_id not in servers_data:
         await interaction.response.send_message("❌ لا توجد بيانات!", ephemeral=True)
         return
 
-    del servers_data[user_id]
-    if user_id in stats_data:
-        del stats_data[user_id]
+    entry = servers_data[user_id]
+    if name:
+        server_id = find_server_by_name(user_id, name)
+        if server_id is None:
+            await interaction.response.send_message("❌ لا يوجد سيرفر بهذا الاسم!", ephemeral=True)
+            return
+        removed = [server_id]
+    else:
+        removed = list(entry.get("servers", {}))
+
+    for server_id in removed:
+        info = entry["servers"].pop(server_id, None)
+        stats_data.pop(server_id, None)
+        heartbeats.pop(server_id, None)
+        push_targets.discard(server_id)
+        unpublish_status(server_id)
+        sparkline_cache.pop(server_id, None)
+        if info and info.get("heartbeat_token"):
+            heartbeat_tokens.pop(info["heartbeat_token"], None)
+
+    if not entry["servers"]:
+        del servers_data[user_id]
+    elif entry.get("selected") not in entry["servers"]:
+        entry["selected"] = next(iter(entry["servers"]))
+
     save_data(servers_data)
     save_stats(stats_data)
-    await interaction.response.send_message("✅ تم حذف جميع البيانات!", ephemeral=True)
+    if name:
+        await interaction.response.send_message(f"✅ تم حذف السيرفر **{name}**!", ephemeral=True)
+    else:
+        await interaction.response.send_message("✅ تم حذف جميع البيانات!", ephemeral=True)
+
+# -------------------------------------------------------------------
+@bot.tree.command(name="تنبيهات", description="تنبيه قناة أو رتبة عند تغيّر حالة السيرفر")
+@app_commands.describe(
+    enabled="تفعيل أو تعطيل التنبيهات",
+    channel="قناة التنبيهات",
+    role="رتبة يتم منشنها (اختياري)"
+)
+@app_commands.choices(enabled=[
+    app_commands.Choice(name="تفعيل", value="true"),
+    app_commands.Choice(name="تعطيل", value="false")
+])
+@app_commands.default_permissions(manage_channels=True)
+async def تنبيهات(interaction: discord.Interaction, enabled: app_commands.Choice[str],
+                  channel: Optional[discord.TextChannel] = None, role: Optional[discord.Role] = None):
+    user_id = str(interaction.user.id)
+    info = get_selected_server(user_id)
+    if info is None:
+        await interaction.response.send_message("❌ لم يتم تحديد سيرفر!", ephemeral=True)
+        return
+
+    if enabled.value == "false":
+        info["notify_channel_id"] = None
+        info["notify_role_id"] = None
+        save_data(servers_data)
+        await interaction.response.send_message("✅ تم تعطيل التنبيهات", ephemeral=True)
+        return
+
+    if channel is None:
+        await interaction.response.send_message("❌ اختر قناة التنبيهات!", ephemeral=True)
+        return
+
+    # البوت قد يملك Mention Everyone: لا منشن لرتبة لا يستطيع صاحب الأمر منشنها بنفسه
+    if role and not role.mentionable and not interaction.permissions.mention_everyone:
+        await interaction.response.send_message(
+            f"❌ لا يمكنك منشن {role.mention}! اختر رتبة قابلة للمنشن.", ephemeral=True
+        )
+        return
+
+    info["notify_channel_id"] = channel.id
+    info["notify_role_id"] = role.id if role else None
+    save_data(servers_data)
+    await interaction.response.send_message(
+        f"✅ التنبيهات في {channel.mention}" + (f" مع منشن {role.mention}" if role else "") +
+        f"\nالتغييرات خلال {NOTIFY_WINDOW} ثانية تُجمع في رسالة واحدة",
+        ephemeral=True
+    )
+
+# -------------------------------------------------------------------
+@bot.tree.command(name="رمز_النبض", description="إنشاء رمز Heartbeat ليرسل السيرفر حالته بنفسه")
+async def رمز_النبض(interaction: discord.Interaction):
+    user_id = str(interaction.user.id)
+    info = get_selected_server(user_id)
+    if info is None:
+        await interaction.response.send_message("❌ لم يتم تحديد سيرفر!", ephemeral=True)
+        return
+
+    # إلغاء الرمز القديم إذا موجود
+    if info.get("heartbeat_token"):
+        heartbeat_tokens.pop(info["heartbeat_token"], None)
+
+    token = secrets.token_urlsafe(24)
+    info["heartbeat_token"] = token
+    heartbeat_tokens[token] = servers_data[user_id]["selected"]
+    save_data(servers_data)
+
+    await interaction.response.send_message(
+        f"💓 **رمز Heartbeat الجديد** (لا تشاركه مع أحد):\n||`{token}`||\n\n"
+        f"أرسل من السيرفر كل دقيقة:\n"
+        f"```POST /heartbeat\nAuthorization: Bearer <token>\n"
+        f'{{"players": 5, "max_players": 20, "motd": "...", "tps": 19.9}}```\n'
+        f"إذا توقف الإرسال أكثر من {HEARTBEAT_TIMEOUT} ثانية يرجع البوت للفحص العادي.",
+        ephemeral=True
+    )
 
 # -------------------------------------------------------------------
 @bot.tree.command(name="حالة_سريعة", description="عرض حالة السيرفر بشكل مختصر")
 async def حالة_سريعة(interaction: discord.Interaction):
     user_id = str(interaction.user.id)
-    if user_id not in servers_data or "ip" not in servers_data[user_id]:
+    info = get_selected_server(user_id)
+    if info is None:
         await interaction.response.send_message("❌ لم يتم تحديد سيرفر!", ephemeral=True)
         return
     
-    await interaction.response.defer(ephemeral=True)
-    
-    info = servers_data[user_id]
-    ip = info["ip"]
-    port = info["port"]
+    # لا يوجد فحص داخل الأمر: الرد دائماً من آخر نتيجة، والتحديث في الخلفية
+    now = time.time()
+    wait = QUICK_USER_COOLDOWN - (now - quick_users.get(user_id, 0))
+    if wait > 0:
+        await interaction.response.send_message(f"⏳ انتظر {math.ceil(wait)} ثانية", ephemeral=True)
+        return
+    quick_users[user_id] = now
     
     if info.get("maintenance"):
-        await interaction.followup.send("🚧 السيرفر تحت الصيانة", ephemeral=True)
+        await interaction.response.send_message("🚧 السيرفر تحت الصيانة", ephemeral=True)
         return
     
-    status = await check_server_status_smart(ip, port)
+    server_id = servers_data[user_id]["selected"]
+    latest = get_latest_status(server_id)
+    age = now - latest[0] if latest else None
+    refreshing = (age is None or age > QUICK_MAX_AGE) and schedule_refresh(server_id, info)
+    
+    if latest is None:
+        msg = "🔄 **جاري فحص السيرفر**..." if refreshing else "❔ لا توجد نتيجة بعد"
+        await interaction.response.send_message(msg + "\nأعد المحاولة بعد ثوانٍ", ephemeral=True)
+        return
     
+    status = latest[1]
     if status["status"] == "online":
-        msg = f"🟢 **أونلاين** | {status['players']} لاعب | Ping: {status['latency']}ms"
+        msg = f"🟢 **أونلاين** | {status['players']} لاعب"
+        if status.get("latency"):
+            msg += f" | Ping: {status['latency']}ms"
     elif status["status"] == "standby":
         msg = f"🟠 **Standby** | السيرفر يتحمل..."
     else:
         msg = f"🔴 **أوفلاين**"
     
-    await interaction.followup.send(msg, ephemeral=True)
+    msg += f"\n🕒 {format_age(age)}"
+    if refreshing:
+        msg += " | 🔄 جاري التحديث في الخلفية"
+    
+    await interaction.response.send_message(msg, ephemeral=True)
 
 # -------------------------------------------------------------------
 @bot.tree.command(name="الإحصائيات", description="عرض إحصائيات مفصلة")
 async def الإحصائيات(interaction: discord.Interaction):
     user_id = str(interaction.user.id)
-    if user_id not in stats_data:
+    server_id = servers_data.get(user_id, {}).get("selected")
+    if server_id not in stats_data:
         await interaction.response.send_message("❌ لا توجد إحصائيات!", ephemeral=True)
         return
     
-    stats = stats_data[user_id]
+    stats = stats_data[server_id]
     
     embed = discord.Embed(title="📊 الإحصائيات المفصلة", color=0x9b59b6)
     
@@ -717,8 +2304,11 @@ async def مساعدة(interaction: discord.Interaction):
         name="⚙️ الإعداد",
         value=(
             "`/تحديد` - حدد السيرفر\n"
+            "`/سيرفراتي` - كل سيرفراتك\n"
+            "`/اختيار_سيرفر` - بدّل السيرفر المختار\n"
             "`/مدعوم` - حدد النسخة\n"
-            "`/تحديد_الروم` - اختر القناة"
+            "`/تحديد_الروم` - اختر القناة\n"
+            "`/لوحة_مجمعة` - لوحة واحدة لكل القناة"
         ),
         inline=False
     )
@@ -728,7 +2318,9 @@ async def مساعدة(interaction: discord.Interaction):
         value=(
             "`/تعيين_اسم` - اسم Board\n"
             "`/تعيين_صورة` - أضف صورة\n"
-            "`/تخصيص_الرسالة` - غيّر الاستايل"
+            "`/تخصيص_الرسالة` - غيّر الاستايل\n"
+            "`/كلمات_الاستعداد` - كلمات MOTD للاستعداد\n"
+            "`/سجل_اللاعبين` - رسم اللاعبين 24 ساعة"
         ),
         inline=False
     )
@@ -737,6 +2329,8 @@ async def مساعدة(interaction: discord.Interaction):
         name="🛠️ الإدارة",
         value=(
             "`/صيانة` - وضع الصيانة\n"
+            "`/رمز_النبض` - Heartbeat بدل الفحص\n"
+            "`/تنبيهات` - تنبيه عند تغيّر الحالة\n"
             "`/حالة_سريعة` - فحص سريع\n"
             "`/الإحصائيات` - إحصائيات مفصلة"
         ),
@@ -762,16 +2356,32 @@ async def مساعدة(interaction: discord.Interaction):
 async def تحديد_الروم(interaction: discord.Interaction, channel: discord.TextChannel):
     user_id = str(interaction.user.id)
 
-    if user_id not in servers_data or "ip" not in servers_data[user_id]:
+    info = get_selected_server(user_id)
+    if info is None:
         await interaction.response.send_message("❌ لم يتم تحديد سيرفر!", ephemeral=True)
         return
 
-    servers_data[user_id]["channel_id"] = channel.id
+    info["channel_id"] = channel.id
+    info["guild_id"] = channel.guild.id
     save_data(servers_data)
 
+    if is_aggregated_channel(channel.id):
+        await interaction.response.send_message(
+            f"✅ سيظهر السيرفر في اللوحة المجمعة في {channel.mention} مع التحديث القادم",
+            ephemeral=True
+        )
+        return
+
+    # القناة تملكها نسخة أخرى: هي من تنشئ الرسالة في دورتها القادمة
+    if not owns_channel(channel.id):
+        await interaction.response.send_message(
+            f"✅ تم تحديد {channel.mention}، الرسالة تظهر مع التحديث القادم",
+            ephemeral=True
+        )
+        return
+
     await interaction.response.defer(ephemeral=True)
 
-    info = servers_data[user_id]
     ip = info["ip"]
     port = info["port"]
     version = info.get("version", "غير محددة")
@@ -786,29 +2396,32 @@ async def تحديد_الروم(interaction: discord.Interaction, channel: disco
     if is_maintenance:
         status = {"status": "maintenance", "players": 0, "latency": 0}
     else:
-        status = await check_server_status_smart(ip, port)
+        status = await check_server_status_smart(ip, port, tuple(info.get("standby_keywords", ())))
     
+    server_id = servers_data[user_id]["selected"]
+    history = get_history_line(server_id) if info.get("show_history") else None
     embed = build_embed(ip, port, version, status, board, image_url, image_pos, 
-                       style, custom_title, custom_desc, is_maintenance)
-    view = JoinButton(ip, port, board)
+                       style, custom_title, custom_desc, is_maintenance, history)
 
     try:
         message_id = info.get("message_id")
         if message_id:
             try:
-                msg = await channel.fetch_message(message_id)
-                await msg.edit(embed=embed, view=view)
+                # الزر موجود مسبقاً في الرسالة، التعديل يرسل الـ Embed فقط
+                await channel.get_partial_message(message_id).edit(embed=embed)
                 await interaction.followup.send(f"✅ تم التحديث في {channel.mention}", ephemeral=True)
                 return
             except:
                 pass
 
-        sent = await channel.send(embed=embed, view=view)
+        sent = await channel.send(embed=embed, view=get_join_view())
         try:
             await sent.pin()
         except:
             pass
-        servers_data[user_id]["message_id"] = sent.id
+        info["message_id"] = sent.id
+        index_message(sent.id, ("server", user_id, server_id))
+        record_messages(f"server:{server_id}", [sent.id])
         save_data(servers_data)
         await interaction.followup.send(f"✅ تم إنشاء الرسالة في {channel.mention}", ephemeral=True)
 
@@ -817,14 +2430,219 @@ async def تحديد_الروم(interaction: discord.Interaction, channel: disco
     except Exception as e:
         await interaction.followup.send(f"❌ خطأ: {e}", ephemeral=True)
 
+# -------------------------------------------------------------------
+@bot.tree.command(name="لوحة_مجمعة", description="عرض كل سيرفرات القناة في رسالة واحدة")
+@app_commands.describe(
+    enabled="تفعيل أو تعطيل اللوحة المجمعة",
+    channel="اختر القناة",
+    title="عنوان اللوحة (اختياري)",
+    style="استايل اللوحة (اختياري)"
+)
+@app_commands.choices(enabled=[
+    app_commands.Choice(name="تفعيل", value="true"),
+    app_commands.Choice(name="تعطيل", value="false")
+], style=STYLE_CHOICES)
+@app_commands.default_permissions(manage_channels=True)
+async def لوحة_مجمعة(interaction: discord.Interaction, enabled: app_commands.Choice[str],
+                      channel: discord.TextChannel, title: Optional[str] = None,
+                      style: Optional[app_commands.Choice[str]] = None):
+    channel_key = str(channel.id)
+    board_cfg = channels_data.setdefault(channel_key, {})
+
+    if enabled.value == "true":
+        board_cfg["aggregate"] = True
+        board_cfg["guild_id"] = channel.guild.id
+        if title:
+            board_cfg["title"] = clip(title, 200)
+        if style:
+            board_cfg["style"] = style.value
+        save_channels(channels_data)
+
+        await interaction.response.defer(ephemeral=True)
+
+        # حذف الرسائل المنفصلة القديمة لسيرفرات هذه القناة (وإلا يحذفها مالك القناة في دورته)
+        if owns_channel(channel.id):
+            for _, server_id, info in iter_servers():
+                if info.get("channel_id") == channel.id and info.get("message_id"):
+                    await delete_server_message(channel, server_id, info)
+        save_data(servers_data)
+
+        await interaction.followup.send(
+            f"✅ تم تفعيل اللوحة المجمعة في {channel.mention}\n"
+            f"حتى {BOARD_MAX_FIELDS} سيرفر في كل رسالة، تظهر مع التحديث القادم",
+            ephemeral=True
+        )
+    else:
+        board_cfg["aggregate"] = False
+        await interaction.response.defer(ephemeral=True)
+
+        # حذف صفحات اللوحة القديمة حتى لا تبقى بحالة متجمدة (أو يحذفها مالك القناة)
+        if owns_channel(channel.id):
+            await remove_board_pages(channel, board_cfg)
+        save_channels(channels_data)
+
+        await interaction.followup.send(
+            f"✅ تم تعطيل اللوحة المجمعة في {channel.mention}\n"
+            f"كل سيرفر سيحصل على رسالته الخاصة مع التحديث القادم",
+            ephemeral=True
+        )
+
+# -------------------------------------------------------------------
+@bot.tree.command(name="حصة_سيرفر", description="(للمدراء) تحديد وزن وحصص Guild في التحديث التلقائي")
+@app_commands.describe(
+    guild_id="رقم الـ Guild",
+    weight="الوزن في الجدولة (افتراضي 1)",
+    probe_limit="حد الفحوصات لكل نافذة (0 = بدون حد)",
+    edit_limit="حد تعديلات الرسائل لكل نافذة (0 = بدون حد)"
+)
+async def حصة_سيرفر(interaction: discord.Interaction, guild_id: str, weight: Optional[float] = None,
+                     probe_limit: Optional[int] = None, edit_limit: Optional[int] = None):
+    if not await is_bot_admin(interaction.user):
+        await interaction.response.send_message("❌ هذا الأمر لمدراء البوت فقط!", ephemeral=True)
+        return
+    if not guild_id.isdigit():
+        await interaction.response.send_message("❌ رقم الـ Guild غير صالح!", ephemeral=True)
+        return
+
+    cfg = guilds_data.setdefault(guild_id, {})
+    if weight is not None:
+        cfg["weight"] = max(weight, 0.1)
+    if probe_limit is not None:
+        cfg["probe_limit"] = max(probe_limit, 0)
+    if edit_limit is not None:
+        cfg["edit_limit"] = max(edit_limit, 0)
+    save_guilds(guilds_data)
+
+    await interaction.response.send_message(
+        f"✅ Guild `{guild_id}`: وزن **{cfg.get('weight', 1)}** | "
+        f"فحوصات **{cfg.get('probe_limit', GUILD_PROBE_LIMIT) or '∞'}** | "
+        f"تعديلات **{cfg.get('edit_limit', GUILD_EDIT_LIMIT) or '∞'}** "
+        f"لكل {GUILD_QUOTA_WINDOW} ثانية",
+        ephemeral=True
+    )
+
+# -------------------------------------------------------------------
+@bot.tree.command(name="استخدام_السيرفرات", description="(للمدراء) نصيب كل Guild من الفحوصات والتعديلات")
+async def استخدام_السيرفرات(interaction: discord.Interaction):
+    if not await is_bot_admin(interaction.user):
+        await interaction.response.send_message("❌ هذا الأمر لمدراء البوت فقط!", ephemeral=True)
+        return
+
+    rows = scheduler.shares()
+    if not rows:
+        await interaction.response.send_message("❌ لا توجد بيانات استخدام بعد!", ephemeral=True)
+        return
+
+    lines = [
+        f"`{guild_id}` — {share:.1f}% | 🔍 {probes} | ✏️ {edits}" + (f" | ⏸️ {deferred} مؤجل" if deferred else "")
+        for guild_id, probes, edits, deferred, share in rows[:20]
+    ]
+    embed = discord.Embed(title="⚖️ استخدام الـ Guilds", description="\n".join(lines), color=0x3498db)
+    embed.set_footer(text=f"آخر نافذة ({GUILD_QUOTA_WINDOW} ثانية) | {len(rows)} Guild")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# -------------------------------------------------------------------
+@bot.tree.command(name="تحليل_الأداء", description="(للمدراء) cProfile و tracemalloc أثناء التشغيل")
+@app_commands.describe(action="الإجراء", cycles="عدد دورات التحديث لـ cProfile")
+@app_commands.choices(action=[
+    app_commands.Choice(name="cProfile حول دورات التحديث", value="cprofile"),
+    app_commands.Choice(name="tracemalloc snapshot", value="snapshot"),
+    app_commands.Choice(name="tracemalloc مقارنة بالسابق", value="diff"),
+    app_commands.Choice(name="إيقاف tracemalloc", value="stop"),
+    app_commands.Choice(name="الحالة", value="status")
+])
+async def تحليل_الأداء(interaction: discord.Interaction, action: app_commands.Choice[str], cycles: Optional[int] = 3):
+    if not await is_bot_admin(interaction.user):
+        await interaction.response.send_message("❌ هذا الأمر لمدراء البوت فقط!", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+    # الـ snapshot قد يأخذ وقتاً مع ذاكرة كبيرة
+    result = await asyncio.to_thread(profiler.run, action.value, cycles or 3)
+    await interaction.followup.send(result, ephemeral=True)
+
+# -------------------------------------------------------------------
+# حذف الرسائل (يستدعيها مالك القناة فقط)
+async def delete_server_message(channel, server_id: str, info: Dict[str, Any]):
+    message_index.pop(int(info["message_id"]), None)
+    try:
+        await channel.get_partial_message(info["message_id"]).delete()
+    except Exception:
+        pass
+    info["message_id"] = None
+    record_messages(f"server:{server_id}", [])
+
+async def remove_board_pages(channel, board_cfg: Dict[str, Any]):
+    for message_id in board_cfg.get("message_ids", []):
+        message_index.pop(int(message_id), None)
+        try:
+            await channel.get_partial_message(message_id).delete()
+        except Exception:
+            pass
+    if board_cfg.get("message_ids"):
+        record_messages(f"board:{channel.id}", [])
+    board_cfg["message_ids"] = []
+
+# -------------------------------------------------------------------
+# تحديث اللوحة المجمعة (رسالة لكل 25 سيرفر)
+async def update_channel_board(channel, entries):
+    board_cfg = channels_data.setdefault(str(channel.id), {"aggregate": True})
+    style = board_cfg.get("style", "classic")
+
+    chunks = [entries[i:i + BOARD_MAX_FIELDS] for i in range(0, len(entries), BOARD_MAX_FIELDS)] or [[]]
+    old_ids = list(board_cfg.get("message_ids", []))
+    new_ids = []
+
+    for page, chunk in enumerate(chunks, 1):
+        embed = build_board_embed(chunk, style, board_cfg.get("title"), page, len(chunks))
+        message_id = old_ids[page - 1] if page - 1 < len(old_ids) else None
+
+        if message_id:
+            try:
+                # رسالة جزئية: تعديل مباشر بدون fetch_message
+                await channel.get_partial_message(message_id).edit(embed=embed)
+                new_ids.append(message_id)
+                continue
+            except discord.NotFound:
+                pass
+
+        sent = await channel.send(embed=embed, view=get_join_view())
+        try:
+            await sent.pin()
+        except:
+            pass
+        new_ids.append(sent.id)
+        index_message(sent.id, ("board", str(channel.id), page))
+        log(f"📝 تم إنشاء صفحة {page} للوحة المجمعة في {channel.id}", Colors.BLUE)
+
+    # حذف الصفحات الزائدة إذا قل عدد السيرفرات
+    for message_id in old_ids[len(chunks):]:
+        try:
+            await channel.get_partial_message(message_id).delete()
+        except Exception:
+            pass
+
+    if new_ids != old_ids:
+        record_messages(f"board:{channel.id}", new_ids)
+    board_cfg["message_ids"] = new_ids
+
 # -------------------------------------------------------------------
 # نظام التحديث التلقائي المحسّن
 @tasks.loop(minutes=1)
 async def update_servers():
     await bot.wait_until_ready()
     log("🔄 بدء دورة التحديث التلقائي...", Colors.BLUE)
+    profiler.cycle_start()
     
-    for user_id, info in list(servers_data.items()):
+    # تجديد الـ Leases وأخذ أرقام رسائل الـ partitions المستلمة
+    if lease_manager:
+        await refresh_leases()
+
+    # سيرفرات القنوات المجمعة: channel_id -> (channel, [(info, status)])
+    boards = {}
+
+    # ترتيب عادل بين الـ Guilds بدل ترتيب التسجيل
+    for user_id, server_id, info in scheduler.order(list(iter_servers()), guild_of_target, key_of_target):
         try:
             ip = info.get("ip")
             port = info.get("port")
@@ -843,58 +2661,131 @@ async def update_servers():
             if not ip or not port or not channel_id:
                 continue
 
+            # الدورة الطويلة قد تقترب من انتهاء الـ Lease
+            if lease_manager and lease_manager.needs_renewal():
+                await refresh_leases()
+
+            # قناة تملكها نسخة أخرى
+            if not owns_channel(channel_id):
+                continue
+
             channel = bot.get_channel(channel_id)
             if not channel:
                 continue
 
+            # السيرفرات القديمة بدون guild_id
+            if not info.get("guild_id") and getattr(channel, "guild", None):
+                info["guild_id"] = channel.guild.id
+            guild_id = info.get("guild_id") or "unknown"
+
             if is_maintenance:
                 status = {"status": "maintenance", "players": 0, "latency": 0}
             else:
-                status = await check_server_status_smart(ip, port)
+                # Heartbeat حديث = لا حاجة لفحص السيرفر
+                status = get_heartbeat_status(server_id)
+                if status is None:
+                    if not scheduler.take(guild_id, "probe", server_id):
+                        # انتهت حصة الفحص، يُفحص أولاً في النافذة القادمة
+                        # ويبقى في اللوحة المجمعة بآخر حالة معروفة بدل أن تُحذف صفحته
+                        if is_aggregated_channel(channel_id):
+                            boards.setdefault(channel_id, (channel, []))[1].append(
+                                (info, last_known_status(server_id, info)))
+                        continue
+                    status = await check_server_status_smart(ip, port, tuple(info.get("standby_keywords", ())))
             
             # تسجيل تغيير الحالة
             current_status = status.get("status", "unknown")
             if current_status != last_status and last_status != "unknown":
-                log_status_change(user_id, last_status, current_status)
+                log_status_change(server_id, last_status, current_status)
+                queue_notification(server_id, info, last_status, current_status)
                 log(f"📊 {ip}:{port} تغيرت من {last_status} إلى {current_status}", Colors.YELLOW)
             
-            servers_data[user_id]["last_status"] = current_status
+            if current_status != last_status:
+                record_last_status(server_id, current_status)
+            info["last_status"] = current_status
+            publish_status(server_id, info, status)
+            if not is_maintenance:
+                latest_status[server_id] = (time.time(), status)
+                record_players_sample(server_id, status.get("players", 0))
+
+            # القناة المجمعة: تُحدّث مرة واحدة بعد انتهاء الفحص
+            if is_aggregated_channel(channel_id):
+                boards.setdefault(channel_id, (channel, []))[1].append((info, status))
+                if message_id:
+                    # رسالة منفصلة قديمة (اللوحة فُعّلت من نسخة لا تملك القناة)
+                    await delete_server_message(channel, server_id, info)
+                continue
             
+            if not scheduler.take(guild_id, "edit", server_id):
+                continue  # انتهت حصة التعديل
+
+            history = get_history_line(server_id) if info.get("show_history") else None
             embed = build_embed(ip, port, version, status, board, image_url, image_pos,
-                              style, custom_title, custom_desc, is_maintenance)
-            view = JoinButton(ip, port, board)
+                              style, custom_title, custom_desc, is_maintenance, history)
 
             if message_id:
                 try:
-                    msg = await channel.fetch_message(message_id)
-                    await msg.edit(embed=embed, view=view)
+                    # تعديل مباشر بدون fetch_message، والزر يبقى كما هو في الرسالة
+                    await channel.get_partial_message(message_id).edit(embed=embed)
                     log(f"✅ تم تحديث {ip}:{port} - الحالة: {current_status}", Colors.GREEN)
                 except discord.NotFound:
-                    sent = await channel.send(embed=embed, view=view)
+                    sent = await channel.send(embed=embed, view=get_join_view())
                     try:
                         await sent.pin()
                     except:
                         pass
-                    servers_data[user_id]["message_id"] = sent.id
+                    info["message_id"] = sent.id
+                    index_message(sent.id, ("server", user_id, server_id))
+                    record_messages(f"server:{server_id}", [sent.id])
                     log(f"📝 تم إنشاء رسالة جديدة لـ {ip}:{port}", Colors.BLUE)
                 except Exception as e:
                     log(f"⚠️ خطأ في تحديث {ip}:{port}: {e}", Colors.RED)
             else:
-                sent = await channel.send(embed=embed, view=view)
+                sent = await channel.send(embed=embed, view=get_join_view())
                 try:
                     await sent.pin()
                 except:
                     pass
-                servers_data[user_id]["message_id"] = sent.id
+                info["message_id"] = sent.id
+                index_message(sent.id, ("server", user_id, server_id))
+                record_messages(f"server:{server_id}", [sent.id])
                 log(f"📝 تم إنشاء رسالة جديدة لـ {ip}:{port}", Colors.BLUE)
 
-            await asyncio.sleep(1)
+            await asyncio.sleep(EDIT_DELAY)
 
         except Exception as e:
             log(f"❌ خطأ أثناء تحديث {info.get('ip')}: {e}", Colors.RED)
+
+    # تعديل واحد لكل لوحة مجمعة بدل تعديل لكل سيرفر (بترتيب التسجيل، لا بترتيب الجدولة)
+    rank = {id(info): n for n, (_, _, info) in enumerate(iter_servers())}
+    for channel_id, (channel, entries) in boards.items():
+        if not owns_channel(channel_id):
+            continue
+        entries.sort(key=lambda entry: rank.get(id(entry[0]), len(rank)))
+        if not scheduler.take(entries[0][0].get("guild_id") or "unknown", "edit"):
+            continue
+        try:
+            await update_channel_board(channel, entries)
+            log(f"✅ تم تحديث اللوحة المجمعة في {channel_id} ({len(entries)} سيرفر)", Colors.GREEN)
+            await asyncio.sleep(EDIT_DELAY)
+        except Exception as e:
+            log(f"⚠️ خطأ في تحديث اللوحة المجمعة {channel_id}: {e}", Colors.RED)
     
+    # صفحات لوحات معطلة لم تُحذف (التعطيل من نسخة لا تملك القناة)
+    pages_removed = False
+    for channel_key, board_cfg in list(channels_data.items()):
+        if board_cfg.get("aggregate") or not board_cfg.get("message_ids") or not owns_channel(channel_key):
+            continue
+        channel = bot.get_channel(int(channel_key))
+        if channel:
+            await remove_board_pages(channel, board_cfg)
+            pages_removed = True
+
     # حفظ البيانات بعد كل دورة
     save_data(servers_data)
+    if boards or pages_removed:
+        save_channels(channels_data)
+    profiler.cycle_end()
 
 # -------------------------------------------------------------------
 # مهمة الحفظ التلقائي (كل دقيقة)
@@ -902,8 +2793,41 @@ async def update_servers():
 async def auto_save():
     save_data(servers_data)
     save_stats(stats_data)
+    save_channels(channels_data)
     log("💾 تم الحفظ التلقائي للبيانات", Colors.BLUE)
 
+# -------------------------------------------------------------------
+# إرسال التنبيهات المجمعة (كل NOTIFY_WINDOW ثانية)
+@tasks.loop(seconds=NOTIFY_WINDOW)
+async def flush_notifications():
+    for channel_id in list(notification_queue):
+        pending = notification_queue[channel_id]
+        # سيرفر رجع لحالته الأولى خلال النافذة = لا يوجد تغيير
+        events = [e for e in pending.values() if e["from"] != e["to"]]
+        if not events:
+            del notification_queue[channel_id]
+            continue
+        if not can_notify(channel_id):
+            continue  # تبقى في الطابور وتُدمج مع القادم
+
+        del notification_queue[channel_id]
+        channel = bot.get_channel(channel_id)
+        if not channel:
+            continue
+        try:
+            await channel.send(
+                build_notification(events),
+                allowed_mentions=discord.AllowedMentions(roles=True, users=False, everyone=False)
+            )
+            notification_sent[channel_id].append(time.time())
+            log(f"🔔 تم إرسال {len(events)} تنبيه في {channel_id}", Colors.BLUE)
+        except (discord.Forbidden, discord.NotFound) as e:
+            log(f"⚠️ لا يمكن إرسال التنبيهات في {channel_id}: {e}", Colors.RED)
+        except Exception as e:
+            # خطأ مؤقت: التغييرات ترجع للطابور وتُرسل في النافذة القادمة
+            requeue_notifications(channel_id, pending)
+            log(f"⚠️ خطأ في إرسال التنبيهات لـ {channel_id}: {e}", Colors.RED)
+
 # -------------------------------------------------------------------
 # تنظيف الـ Cache (كل 5 دقائق)
 @tasks.loop(minutes=5)
@@ -913,6 +2837,15 @@ async def clean_cache():
     old_keys = [k for k, (t, _) in status_cache.items() if current_time - t > CACHE_DURATION * 2]
     for k in old_keys:
         del status_cache[k]
+
+    prune_status_tombstones()
+
+    # الحالة السريعة: السيرفرات المحذوفة والـ cooldowns المنتهية
+    for server_id in [sid for sid in latest_status if get_server(sid) is None]:
+        del latest_status[server_id]
+    for cooldowns, duration in ((refresh_times, QUICK_TARGET_COOLDOWN), (quick_users, QUICK_USER_COOLDOWN)):
+        for key in [k for k, t in cooldowns.items() if current_time - t > duration]:
+            del cooldowns[key]
     if old_keys:
         log(f"🧹 تم تنظيف {len(old_keys)} عنصر من الـ Cache", Colors.YELLOW)
 
@@ -920,7 +2853,7 @@ async def clean_cache():
 @bot.event
 async def on_ready():
     log(f"✅ {bot.user} is online and ready!", Colors.GREEN)
-    log(f"📊 Servers: {len(servers_data)} | Stats: {len(stats_data)}", Colors.BLUE)
+    log(f"📊 Users: {len(servers_data)} | Servers: {sum(1 for _ in iter_servers())} | Stats: {len(stats_data)}", Colors.BLUE)
     
     try:
         synced = await bot.tree.sync()
@@ -928,8 +2861,8 @@ async def on_ready():
     except Exception as e:
         log(f"❌ Error syncing commands: {e}", Colors.RED)
 
-    # تسجيل الـ View
-    bot.add_view(JoinButton("", "", ""))
+    # تسجيل الـ View الدائم (واحد لكل الرسائل)
+    bot.add_view(get_join_view())
 
     # بدء المهام
     if not update_servers.is_running():
@@ -944,6 +2877,10 @@ async def on_ready():
         clean_cache.start()
         log("🧹 Cache cleaner started", Colors.GREEN)
 
+    if not flush_notifications.is_running():
+        flush_notifications.start()
+        log("🔔 Notifications task started", Colors.GREEN)
+
 # -------------------------------------------------------------------
 if __name__ == "__main__":
     health_thread = Thread(target=run_health_server, daemon=True)
@@ -0,0 +1,448 @@
+"""
+Soak test: محاكاة أيام من التحديث التلقائي خلال دقائق
+
+- سيرفرات Minecraft وهمية محلية (Server List Ping) بسيناريوهات:
+  ثابت / متذبذب / انقطاع يومي / Standby / Heartbeat ثم توقف /
+  Blackhole (يقبل الاتصال ولا يرد، والـ API الاحتياطي يعلق معه)
+- API احتياطي محلي بدل api.mcsrvstat.us
+- ساعة افتراضية: كل دورة update_servers = دقيقة افتراضية
+- قنوات Discord وهمية (بدون اتصال حقيقي)
+
+في النهاية يتأكد أن RSS والـ sockets وحجم ملفات البيانات لا تكبر في النصف
+الثاني من التشغيل، وأن threads البوت لا تزيد عن بدايته (فحص معلق = thread عالق).
+
+التشغيل:
+    python soak_test.py [--days 2] [--targets 12] [--verbose]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import select
+import struct
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# الملفات تُكتب في مجلد مؤقت، والبوت لا ينتظر بين التعديلات
+WORKDIR = tempfile.mkdtemp(prefix="niward-soak-")
+os.chdir(WORKDIR)
+os.environ["EDIT_DELAY"] = "0"
+os.environ["PROBE_TIMEOUT"] = "0.2"  # مهلة حقيقية (ليست افتراضية) حتى لا يطول الـ Blackhole
+os.environ.pop("LEASE_DB", None)
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MINUTE = 60
+DAY = 24 * 60 * MINUTE
+STATUS_CHANGES_CAP = 100  # نفس الحد في log_status_change
+PATTERNS = ["stable", "flapping", "outage", "standby", "push", "blackhole"]
+
+# -------------------------------------------------------------------
+# الساعة الافتراضية (تحل محل time داخل main فقط)
+class VirtualClock:
+    def __init__(self):
+        self.start = time.time()
+        self.offset = 0.0
+
+    def time(self) -> float:
+        return self.start + self.offset
+
+    def advance(self, seconds: float):
+        self.offset += seconds
+
+    def elapsed(self) -> float:
+        return self.offset
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+clock = VirtualClock()
+
+def scripted_state(pattern: str, index: int) -> str:
+    """حالة السيرفر الوهمي حسب السيناريو والوقت الافتراضي"""
+    t = clock.elapsed()
+    if pattern == "flapping":
+        return "online" if int(t // (10 * MINUTE) + index) % 2 == 0 else "offline"
+    if pattern == "outage":
+        return "offline" if 0.30 <= (t % DAY) / DAY < 0.45 else "online"
+    if pattern == "standby":
+        return "standby" if (t % 3600) < 5 * MINUTE else "online"
+    if pattern == "push":
+        return "offline"  # يرسل Heartbeat، والفحص يفشل عند توقفه
+    if pattern == "blackhole":
+        return "blackhole" if 6 * 3600 <= (t % (12 * 3600)) < 6 * 3600 + 20 * MINUTE else "online"
+    return "online"
+
+# -------------------------------------------------------------------
+# سيرفر Minecraft وهمي (Server List Ping)
+def pack_varint(value: int) -> bytes:
+    out = b""
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        out += bytes([byte | (0x80 if value else 0)])
+        if not value:
+            return out
+
+def pack_packet(packet_id: int, payload: bytes) -> bytes:
+    data = pack_varint(packet_id) + payload
+    return pack_varint(len(data)) + data
+
+async def read_varint(reader) -> int:
+    value = 0
+    for i in range(5):
+        byte = (await reader.readexactly(1))[0]
+        value |= (byte & 0x7F) << (7 * i)
+        if not byte & 0x80:
+            return value
+    raise ValueError("varint too long")
+
+async def read_packet(reader) -> bytes:
+    return await reader.readexactly(await read_varint(reader))
+
+class FakeMinecraftServer:
+    def __init__(self, pattern: str, index: int):
+        self.pattern = pattern
+        self.index = index
+        self.host = f"127.0.0.{index + 2}"  # عنوان لكل سيرفر حتى يعرفه الـ API الاحتياطي
+        self.server = None
+        self.port = None
+        self.writers = set()  # اتصالات Blackhole المفتوحة
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        for writer in self.writers:
+            writer.close()
+        await asyncio.sleep(0.1)  # حتى تنتهي اتصالات الـ Blackhole المفتوحة
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        try:
+            state = scripted_state(self.pattern, self.index)
+            if state == "offline":
+                return
+            if state == "blackhole":
+                # لا رد أبداً: المهلة يجب أن تأتي من البوت
+                self.writers.add(writer)
+                try:
+                    while await reader.read(1024):
+                        pass
+                finally:
+                    self.writers.discard(writer)
+                return
+            await read_packet(reader)  # handshake
+            await read_packet(reader)  # status request
+
+            players = int(10 + 10 * math.sin(clock.elapsed() / 3600 + self.index))
+            motd = {"text": "", "extra": [{"text": "§aServer is "}, {"text": "§lStarting..."}]} \
+                if state == "standby" else {"text": f"§6Soak server #{self.index}"}
+            status = {
+                "version": {"name": "1.20.4", "protocol": 765},
+                "players": {"online": players if state == "online" else 0, "max": 20 if state == "online" else 0},
+                "description": motd
+            }
+            body = json.dumps(status).encode()
+            writer.write(pack_packet(0, pack_varint(len(body)) + body))
+            await writer.drain()
+
+            # بعض نسخ mcstatus ترسل ping بعد الحالة
+            try:
+                ping = await asyncio.wait_for(read_packet(reader), timeout=1)
+                writer.write(pack_packet(1, ping[1:9] if len(ping) >= 9 else struct.pack(">q", 0)))
+                await writer.drain()
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+# -------------------------------------------------------------------
+# API احتياطي وهمي (بدل api.mcsrvstat.us)
+fakes_by_host = {}
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        threading.current_thread().name = "fake-api"
+        fake = fakes_by_host.get(self.path.strip("/"))
+        if fake and scripted_state(fake.pattern, fake.index) == "blackhole":
+            # يعلق أطول من كل المهلات، أو حتى يغلق البوت الاتصال
+            select.select([self.connection], [], [], float(os.environ["PROBE_TIMEOUT"]) * 5)
+            return
+        body = b'{"online": false}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except OSError:
+            pass  # البوت أغلق الاتصال بعد المهلة
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle_one_request(self):
+        try:
+            super().handle_one_request()
+        except OSError:
+            pass
+
+# -------------------------------------------------------------------
+# Discord وهمي
+class FakeMessage:
+    next_id = 1000
+
+    def __init__(self):
+        FakeMessage.next_id += 1
+        self.id = FakeMessage.next_id
+        self.edits = 0
+
+    async def edit(self, **kwargs):
+        self.edits += 1
+
+    async def delete(self):
+        pass
+
+    async def pin(self):
+        pass
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild_id: int):
+        self.id = channel_id
+        self.guild = FakeGuild(guild_id)
+        self.messages = {}
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+        message = FakeMessage()
+        self.messages[message.id] = message
+        return message
+
+    def get_partial_message(self, message_id):
+        return self.messages.setdefault(message_id, FakeMessage())
+
+# -------------------------------------------------------------------
+# القياسات
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def open_sockets() -> int:
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return -1
+    count = 0
+    for fd in fds:
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}").startswith("socket:"):
+                count += 1
+        except OSError:
+            pass
+    return count
+
+def data_size_kb() -> float:
+    files = ("servers.json", "stats.json", "channels.json")
+    return sum(os.path.getsize(f) for f in files if os.path.exists(f)) / 1024
+
+def capped_data_kb(main) -> float:
+    """حجم ملفات البيانات لو وصلت كل القوائم المحدودة لحدها الآن
+
+    سجل الحالات والـ Sparkline يكبران حتى حدهما ثم يثبتان، ووقت وصولهما يختلف
+    حسب السيناريو ومدة التشغيل. لذلك المرجع هو الحجم عند الحد لا الحجم الحالي.
+    """
+    stats = json.loads(json.dumps(main.stats_data))
+    for entry in stats.values():
+        changes = entry.get("status_changes")
+        if changes is not None:
+            longest = max(changes, key=lambda c: len(json.dumps(c, ensure_ascii=False)), default={
+                "from": "maintenance", "to": "maintenance", "time": "2000-01-01T00:00:00.000000"
+            })
+            changes.extend([longest] * (STATUS_CHANGES_CAP - len(changes)))
+        history = entry.get("player_history")
+        if history is not None:
+            longest = max(history, key=lambda h: len(json.dumps(h)), default=[0, 0, 0, 0])
+            history.extend([longest] * (main.HISTORY_BUCKETS - len(history)))
+    size = len(json.dumps(stats, indent=4, ensure_ascii=False).encode("utf-8"))
+    size += sum(os.path.getsize(f) for f in ("servers.json", "channels.json") if os.path.exists(f))
+    return size / 1024
+
+def bot_threads() -> int:
+    """threads البوت فقط (بدون threads الـ API الوهمي)"""
+    return sum(1 for t in threading.enumerate() if not t.name.startswith("fake-"))
+
+def sample() -> dict:
+    gc.collect()
+    return {
+        "rss_mb": rss_mb(),
+        "threads": bot_threads(),
+        "sockets": open_sockets(),
+        "data_kb": data_size_kb()
+    }
+
+# -------------------------------------------------------------------
+def check_scheduler(main) -> bool:
+    """Guild واحد بـ 100 سيرفر وحصة 10 فحوصات: خلال 10 نوافذ يجب فحص الكل"""
+    scheduler = main.FairScheduler(window=60, probe_limit=10)
+    targets = [("1", f"s{i}", {"guild_id": 1}) for i in range(100)]
+    probed = set()
+    for _ in range(10):
+        clock.advance(60)
+        for target in scheduler.order(targets, main.guild_of_target, main.key_of_target):
+            if scheduler.take(1, "probe", target[1]):
+                probed.add(target[1])
+    ok = len(probed) == len(targets)
+    print(f"{'✅' if ok else '❌'} scheduler: {len(probed)}/{len(targets)} سيرفر فُحص خلال 10 نوافذ")
+    return ok
+
+async def soak(args) -> int:
+    import main
+
+    main.time = clock
+    scheduler_ok = check_scheduler(main)
+    if not args.verbose:
+        main.log = lambda message, color=None: None
+
+    api = ThreadingHTTPServer(("127.0.0.1", 0), FakeApiHandler)
+    threading.Thread(target=api.serve_forever, name="fake-api-server", daemon=True).start()
+    main.MCSRVSTAT_API = f"http://127.0.0.1:{api.server_address[1]}/"
+
+    # السيرفرات الوهمية والقنوات
+    fakes = []
+    for i in range(args.targets):
+        fake = FakeMinecraftServer(PATTERNS[i % len(PATTERNS)], i)
+        await fake.start()
+        fakes.append(fake)
+        fakes_by_host[fake.host] = fake
+
+    channels = {}
+    for c in range(4):
+        channels[500 + c] = FakeChannel(500 + c, guild_id=900 + c % 3)
+    notify_channel = FakeChannel(600, guild_id=900)
+    channels[600] = notify_channel
+    main.channels_data["503"] = {"aggregate": True, "guild_id": 900}
+
+    tokens = {}
+    for i, fake in enumerate(fakes):
+        user_id = str(100 + i % 5)
+        entry = main.servers_data.setdefault(user_id, {"selected": None, "servers": {}})
+        server_id = main.new_server_id(user_id)
+        channel = channels[500 + i % 4]
+        entry["servers"][server_id] = {
+            "name": f"soak{i}",
+            "ip": fake.host,
+            "port": str(fake.port),
+            "board": f"Soak {fake.pattern} #{i}",
+            "channel_id": channel.id,
+            "guild_id": channel.guild.id,
+            "notify_channel_id": notify_channel.id if i % 2 == 0 else None,
+            "show_history": i % 3 == 0,
+            "last_status": "unknown"
+        }
+        entry["selected"] = server_id
+        if fake.pattern == "push":
+            token = f"soak-token-{i}"
+            entry["servers"][server_id]["heartbeat_token"] = token
+            main.heartbeat_tokens[token] = server_id
+            tokens[token] = fake
+
+    main.bot.get_channel = lambda channel_id: channels.get(channel_id)
+
+    async def ready():
+        return None
+    main.bot.wait_until_ready = ready
+
+    cycles = int(args.days * DAY // MINUTE)
+    baseline = sample()  # قبل أي فحص
+    samples = []
+    started = time.perf_counter()
+    print(f"🧪 Soak: {args.days} يوم = {cycles} دورة | {args.targets} سيرفر | {WORKDIR}")
+
+    for cycle in range(cycles):
+        clock.advance(MINUTE)
+
+        # Heartbeat في النصف الأول فقط، بعدها يرجع البوت للفحص
+        if cycle < cycles // 2:
+            for token in tokens:
+                main.ingest_heartbeat(token, {"players": 3, "max_players": 10, "tps": 20})
+
+        await main.update_servers.coro()
+        await main.flush_notifications.coro()
+        if cycle % 5 == 0:
+            await main.clean_cache.coro()
+        if cycle % 10 == 0:
+            await main.auto_save.coro()
+
+        if cycle % max(cycles // 40, 1) == 0 or cycle == cycles - 1:
+            point = sample()
+            point["cycle"] = cycle
+            point["capped_kb"] = capped_data_kb(main)
+            samples.append(point)
+            if args.verbose or cycle % max(cycles // 8, 1) == 0:
+                print(f"  دورة {cycle:6d} | RSS {point['rss_mb']:7.1f}MB | threads {point['threads']:3d} | "
+                      f"sockets {point['sockets']:3d} | data {point['data_kb']:8.1f}KB")
+
+    for fake in fakes:
+        await fake.stop()
+    api.shutdown()
+
+    # المقارنة: النصف الثاني مقابل القيمة عند المنتصف، والـ threads طوال التشغيل مقابل البداية،
+    # والبيانات مقابل حجمها عند المنتصف لو كانت القوائم المحدودة ممتلئة
+    half = samples[len(samples) // 2]
+    tail = samples[len(samples) // 2:]
+    checks = {
+        "rss_mb": (half["rss_mb"], tail, half["rss_mb"] + args.rss_slack_mb),
+        "threads": (baseline["threads"], samples, baseline["threads"] + args.thread_slack),
+        "sockets": (half["sockets"], tail, half["sockets"] + args.socket_slack),
+        "data_kb": (half["capped_kb"], tail, half["capped_kb"] * 1.02 + 2)
+    }
+
+    failures = [] if scheduler_ok else ["scheduler"]
+    for metric, (base, window, limit) in checks.items():
+        peak = max(point[metric] for point in window)
+        ok = peak <= limit
+        print(f"{'✅' if ok else '❌'} {metric:8s} مرجع {base:8.1f} | أقصى {peak:8.1f} | الحد {limit:8.1f}")
+        if not ok:
+            failures.append(metric)
+
+    edits = sum(m.edits for c in channels.values() for m in c.messages.values())
+    print(f"⏱️ {time.perf_counter() - started:.1f}s حقيقية | {edits} تعديل | "
+          f"{notify_channel.sent} رسالة تنبيه | status_cache={len(main.status_cache)}")
+
+    if failures:
+        print(f"❌ Soak فشل: {', '.join(failures)}")
+        return 1
+    print("✅ Soak نجح")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Niward soak test")
+    parser.add_argument("--days", type=float, default=2, help="الأيام الافتراضية")
+    parser.add_argument("--targets", type=int, default=12, help="عدد السيرفرات الوهمية")
+    parser.add_argument("--rss-slack-mb", type=float, default=20)
+    parser.add_argument("--thread-slack", type=int, default=4)
+    parser.add_argument("--socket-slack", type=int, default=4)
+    parser.add_argument("--verbose", action="store_true")
+    sys.exit(asyncio.run(soak(parser.parse_args())))